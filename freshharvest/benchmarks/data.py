@@ -0,0 +1,43 @@
+"""Shared naming for benchmark fixture rows and their removal."""
+from django.db import connection, transaction
+
+from orders.models import CartItem, FarmerDailySales, Order, OrderItem
+from products.models import Category, CategoryStats, Product
+from users.models import Region, User
+
+BENCH_PREFIX = 'bench-'
+BENCH_EMAIL_DOMAIN = 'bench.freshharvest.local'
+BENCH_PASSWORD = 'bench-pass-2026'
+
+
+def benchmark_users():
+    return User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+
+
+def flush_benchmark_data():
+    """
+    Remove every benchmark row with set-based DELETEs (no per-row signals or
+    cascade collection, which would not scale to millions of rows).
+    """
+    users = benchmark_users().values('id')
+    categories = Category.objects.filter(slug__startswith=BENCH_PREFIX).values('id')
+    products = Product.objects.filter(category__in=categories).values('id')
+    orders = Order.objects.filter(user__in=users).values('id')
+    with transaction.atomic():
+        for queryset in (
+            OrderItem.objects.filter(order__in=orders),
+            OrderItem.objects.filter(product__in=products),
+            CartItem.objects.filter(user__in=users),
+            CartItem.objects.filter(product__in=products),
+            FarmerDailySales.objects.filter(product__in=products),
+            Order.objects.filter(user__in=users),
+            Product.objects.filter(category__in=categories),
+            CategoryStats.objects.filter(category__in=categories),
+            Category.objects.filter(slug__startswith=BENCH_PREFIX),
+        ):
+            sql, params = queryset.values('pk').query.sql_with_params()
+            meta = queryset.model._meta
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {meta.db_table} WHERE {meta.pk.column} IN ({sql})', params)
+        benchmark_users().delete()
+        Region.objects.filter(slug__startswith=BENCH_PREFIX).delete()
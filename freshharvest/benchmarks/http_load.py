@@ -0,0 +1,91 @@
+"""
+Minimal asyncio HTTP/1.1 load generator.
+
+Opens N concurrent keep-alive connections to a real server and replays GET
+paths for a fixed duration. It is deliberately dependency-free so it can
+drive uvicorn and the WSGI server alike; connections the server closes
+(HTTP/1.0, `Connection: close`) are reopened.
+"""
+import asyncio
+import itertools
+import time
+
+from .runner import percentile
+
+
+async def _request(reader, writer, host, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n'.encode())
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    keep_alive = head[0].startswith('HTTP/1.1') and headers.get('connection', '').lower() != 'close'
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while size := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+
+async def _connection(host, port, paths, deadline, latencies, failures):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        path = next(paths)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            status, keep_alive = await _request(reader, writer, f'{host}:{port}', path)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            failures.append(path)
+            keep_alive = False
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                failures.append(path)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run(host, port, paths, connections, duration):
+    latencies, failures = [], []
+    counter = itertools.count()
+    # A unique query param per request defeats response caches on both paths
+    request_paths = (
+        f"{path}{'&' if '?' in path else '?'}bench={n}"
+        for n, path in zip(counter, itertools.cycle(paths))
+    )
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _connection(host, port, request_paths, deadline, latencies, failures)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        'connections': connections,
+        'requests': len(latencies),
+        'errors': len(failures),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def run_http_load(host, port, paths, connections, duration):
+    """Drive `paths` round-robin over `connections` sockets for `duration` s."""
+    return asyncio.run(_run(host, port, paths, connections, duration))
@@ -0,0 +1,101 @@
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.http_load import run_http_load
+from products.models import Product
+
+ASYNC_PATHS = ['/api/products/async/', '/api/products/async/{id}/', '/api/products/async/categories/']
+SYNC_PATHS = ['/api/products/', '/api/products/{id}/', '/api/products/categories/']
+
+TARGETS = {
+    # name: (server, paths)
+    'asgi-async': ('uvicorn', ASYNC_PATHS),
+    'asgi-sync': ('uvicorn', SYNC_PATHS),
+    'wsgi': ('gunicorn', SYNC_PATHS),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare catalog read throughput under many concurrent connections: "
+        "async views under uvicorn (asgi-async), the sync DRF viewsets under "
+        "uvicorn (asgi-sync) and under gunicorn's threaded workers (wsgi). "
+        "Each target runs in its own server, with the same number of worker "
+        "processes, against the current database; requires uvicorn and gunicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', choices=sorted(TARGETS),
+                            help='Target to run (repeatable, default: all)')
+        parser.add_argument('--connections', default='10,100,500',
+                            help='Comma-separated concurrent connection counts')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Server worker processes, for both uvicorn and gunicorn (default: CPU count)')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Threads per gunicorn worker (gthread; uvicorn uses its own thread pool)')
+
+    def handle(self, *args, **options):
+        targets = options['target'] or sorted(TARGETS)
+        for server in sorted({TARGETS[name][0] for name in targets}):
+            if importlib.util.find_spec(server) is None:
+                raise CommandError(f'{server} is not installed (pip install {server})')
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True)[:200])
+        if not product_ids:
+            raise CommandError('No products; run seed_benchmark_data first')
+        connection_counts = [int(n) for n in options['connections'].split(',')]
+
+        for name in targets:
+            server, templates = TARGETS[name]
+            paths = [template.format(id=pid) for pid in product_ids for template in templates]
+            process = self.start_server(server, options['port'], options['workers'], options['threads'])
+            try:
+                for connections in connection_counts:
+                    result = run_http_load('127.0.0.1', options['port'], paths, connections, options['duration'])
+                    self.stdout.write(
+                        f"{name:<11} connections={connections:<5} requests={result['requests']:<7} "
+                        f"errors={result['errors']:<5} throughput={result['throughput_rps']:.1f}/s "
+                        f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms"
+                    )
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+
+    def start_server(self, server, port, workers, threads):
+        address = f'127.0.0.1:{port}'
+        if server == 'uvicorn':
+            command = [
+                sys.executable, '-m', 'uvicorn', 'freshharvest.asgi:application',
+                '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+                '--log-level', 'warning', '--no-access-log',
+            ]
+        else:
+            command = [
+                sys.executable, '-m', 'gunicorn', 'freshharvest.wsgi:application',
+                '--bind', address, '--workers', str(workers), '--worker-class', 'gthread',
+                '--threads', str(threads), '--log-level', 'warning',
+            ]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'freshharvest.settings')}
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'{server} server exited with code {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'{server} server did not start on {address}')
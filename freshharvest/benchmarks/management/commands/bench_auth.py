@@ -0,0 +1,118 @@
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from benchmarks.data import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD, benchmark_users
+from benchmarks.runner import percentile
+from users import hashing
+
+PATHS = {
+    # api: (register, login)
+    'sync': ('/api/auth/register/', '/api/auth/login/'),
+    'async': ('/api/auth/async/register/', '/api/auth/async/login/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure sign-up and login throughput for each password hashing "
+        "pool size (0 = hash inline on the request thread), and throughput "
+        "per core used. Requests go through the full middleware stack from "
+        "--concurrency threads; created users are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default=f'0,1,{os.cpu_count() or 1}',
+                            help='Comma-separated hashing pool sizes to compare')
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per operation and pool size')
+        parser.add_argument('--api', choices=sorted(PATHS), default='sync')
+        parser.add_argument('--iterations', type=int,
+                            help='PBKDF2 iterations (default: PASSWORD_PBKDF2_ITERATIONS)')
+
+    def handle(self, *args, **options):
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        iterations = options['iterations'] or getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None)
+        if iterations:
+            # Spawned pool workers read it from the environment via settings
+            os.environ['PASSWORD_PBKDF2_ITERATIONS'] = str(iterations)
+        tag = uuid.uuid4().hex[:8]
+        register_path, login_path = PATHS[options['api']]
+
+        try:
+            for workers in [int(n) for n in options['workers'].split(',')]:
+                with override_settings(PASSWORD_HASHING_WORKERS=workers, PASSWORD_PBKDF2_ITERATIONS=iterations):
+                    hashing.shutdown()
+                    if workers:
+                        hashing.hash_password('warm-up')  # start the pool outside the timing
+                    self.stdout.write(
+                        f"hasher={get_hasher('default').algorithm} iterations={iterations} "
+                        f"workers={workers} cpus={os.cpu_count()}"
+                    )
+                    emails = itertools.count()
+                    signup = self.run(options, lambda: ('post', register_path, {
+                        'username': f'bench-auth-{tag}-{workers}-{(n := next(emails))}',
+                        'email': f'bench-auth-{tag}-{workers}-{n}@{BENCH_EMAIL_DOMAIN}',
+                        'password': BENCH_PASSWORD, 'password_confirm': BENCH_PASSWORD,
+                        'user_type': 'consumer',
+                    }))
+                    accounts = itertools.cycle(list(
+                        benchmark_users().filter(email__startswith=f'bench-auth-{tag}-{workers}-')
+                        .values_list('email', flat=True)[:options['concurrency']]
+                    ))
+                    login = self.run(options, lambda: ('post', login_path, {
+                        'email': next(accounts), 'password': BENCH_PASSWORD,
+                    }))
+                    for name, result in (('signup', signup), ('login', login)):
+                        self.report(name, workers, result)
+        finally:
+            hashing.shutdown()
+            benchmark_users().filter(email__startswith=f'bench-auth-{tag}-').delete()
+
+    def run(self, options, next_request):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def worker(_):
+            client = Client(raise_request_exception=False)
+            local_latencies, local_errors = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    with lock:
+                        method, path, body = next_request()
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, body, content_type='application/json')
+                    local_latencies.append((time.perf_counter() - started) * 1000)
+                    local_errors += response.status_code >= 400
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+        return {'latencies': latencies, 'errors': sum(errors), 'elapsed': elapsed}
+
+    def report(self, name, workers, result):
+        latencies = result['latencies']
+        throughput = len(latencies) / result['elapsed']
+        # Inline hashing is bound to one core by the GIL
+        cores = min(workers, os.cpu_count() or 1) or 1
+        self.stdout.write(
+            f"  {name:<7} requests={len(latencies):<6} errors={result['errors']:<5} "
+            f"throughput={throughput:.1f}/s per_core={throughput / cores:.1f}/s "
+            f"p50={percentile(latencies, 50):.1f}ms p95={percentile(latencies, 95):.1f}ms"
+        )
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.runner import SCENARIOS, compare, run_scenario
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay catalog browsing, cart, checkout and order-history scenarios "
+        "concurrently against seed_benchmark_data rows and report p50/p95/p99 "
+        "latency, throughput and queries per request. Fails when a run "
+        "regresses past --tolerance against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Scenario to run (repeatable, default: all)')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=50, help='Iterations per worker')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store this run as the new baseline instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative latency/throughput regression (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        results = {}
+        # The test Client sends Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in options['scenario'] or sorted(SCENARIOS):
+                try:
+                    result = run_scenario(name, options['concurrency'], options['iterations'], options['seed'])
+                except RuntimeError as exc:
+                    raise CommandError(str(exc))
+                results[name] = result
+                self.stdout.write(
+                    f"{name:<10} requests={result['requests']:<6} errors={result['errors']:<4} "
+                    f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms "
+                    f"throughput={result['throughput_rps']:.1f}/s queries/req={result['queries_per_request']:.1f}"
+                )
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING('No baseline found; run with --save-baseline to create one'))
+            return
+
+        regressions = compare(results, json.loads(baseline_path.read_text()), options['tolerance'])
+        if regressions:
+            raise CommandError('Performance regression:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,153 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from benchmarks.data import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD, BENCH_PREFIX, flush_benchmark_data
+from orders.models import Order, OrderItem
+from orders.sales import rebuild_sales_rollups
+from products.models import Category, Product
+from products.stats import refresh_category_stats
+from users.models import Region, User
+
+WORDS = [
+    'tomato', 'avocado', 'kale', 'sukuma', 'spinach', 'mango', 'banana', 'onion',
+    'cabbage', 'carrot', 'pepper', 'coriander', 'garlic', 'ginger', 'potato',
+    'organic', 'fresh', 'ripe', 'green', 'red', 'sweet', 'local', 'kiambu',
+]
+STATUSES = ['pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled']
+# Farmer locations: 47 counties x 6 wards spread over Kenya's bounding box
+REGIONS = 47
+WARDS_PER_REGION = 6
+KENYA_LAT = (-4.7, 4.6)
+KENYA_LNG = (33.9, 41.9)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible benchmark dataset: farmers, categories, "
+        "products and buyers with a realistic order history. All rows are "
+        f"tagged with the '{BENCH_PREFIX}' prefix; --flush removes them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmers', type=int, default=500)
+        parser.add_argument('--categories', type=int, default=40)
+        parser.add_argument('--products', type=int, default=1_000_000)
+        parser.add_argument('--buyers', type=int, default=2000)
+        parser.add_argument('--orders', type=int, default=100_000)
+        parser.add_argument('--max-lines', type=int, default=8, help='Max items per order')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help='Only remove existing benchmark rows')
+
+    def handle(self, *args, **options):
+        flush_benchmark_data()
+        if options['flush']:
+            self.stdout.write(self.style.SUCCESS('Benchmark data removed'))
+            return
+
+        rng = random.Random(options['seed'])
+        batch = options['batch_size']
+        password = make_password(BENCH_PASSWORD)
+
+        categories = Category.objects.bulk_create([
+            Category(name=f'{BENCH_PREFIX}category-{i}', slug=f'{BENCH_PREFIX}category-{i}')
+            for i in range(options['categories'])
+        ])
+        counties = Region.objects.bulk_create([
+            Region(name=f'{BENCH_PREFIX}county-{i}', slug=f'{BENCH_PREFIX}county-{i}') for i in range(REGIONS)
+        ])
+        wards = Region.objects.bulk_create([
+            Region(name=f'{county.name}-ward-{j}', slug=f'{county.slug}-ward-{j}', parent=county)
+            for county in counties for j in range(WARDS_PER_REGION)
+        ])
+        farmers = self.bulk_users('farmer', options['farmers'], password, batch, rng=rng, regions=wards)
+        buyers = self.bulk_users('consumer', options['buyers'], password, batch)
+        self.stdout.write(f'{len(farmers)} farmers, {len(buyers)} buyers, {len(categories)} categories')
+
+        today = timezone.now().date()
+        # Parallel lists (ints, not Decimals) keep 1M products cheap in memory
+        product_ids, prices = [], []
+        for start in range(0, options['products'], batch):
+            products = Product.objects.bulk_create([
+                Product(
+                    name=' '.join(rng.sample(WORDS, 3)).title(),
+                    sku=f'{BENCH_PREFIX}{n}',
+                    description=' '.join(rng.choices(WORDS, k=15)),
+                    price=rng.randint(20, 900),
+                    stock_quantity=rng.randint(1_000, 100_000),
+                    is_available=True,
+                    category=rng.choice(categories),
+                    farmer=rng.choice(farmers),
+                    harvest_date=today - timedelta(days=rng.randint(0, 30)),
+                )
+                for n in range(start, min(start + batch, options['products']))
+            ])
+            for product in products:
+                product_ids.append(product.pk)
+                prices.append(product.price)
+            self.stdout.write(f'  products: {len(product_ids)}')
+
+        now = timezone.now()
+        for start in range(0, options['orders'], batch):
+            with transaction.atomic():
+                lines = []
+                orders = []
+                for _ in range(start, min(start + batch, options['orders'])):
+                    chosen = rng.sample(range(len(product_ids)), rng.randint(1, options['max_lines']))
+                    items = [(index, rng.randint(1, 5)) for index in chosen]
+                    lines.append(items)
+                    orders.append(Order(
+                        user=rng.choice(buyers),
+                        total_amount=sum(prices[index] * qty for index, qty in items),
+                        status=rng.choice(STATUSES),
+                        delivery_address=f'{BENCH_PREFIX}address',
+                    ))
+                orders = Order.objects.bulk_create(orders)
+                # Spread created_at over two years (auto_now_add fills "now")
+                for order in orders:
+                    order.created_at = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+                Order.objects.bulk_update(orders, ['created_at'], batch_size=1000)
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order, product_id=product_ids[index],
+                        quantity=qty, price_at_purchase=prices[index],
+                    )
+                    for order, items in zip(orders, lines)
+                    for index, qty in items
+                ], batch_size=batch)
+            self.stdout.write(f'  orders: {min(start + batch, options["orders"])}')
+
+        refresh_category_stats([c.pk for c in categories])
+        # Orders were bulk-inserted past checkout, so derive their rollups
+        rebuild_sales_rollups()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS('Benchmark data ready'))
+
+    def bulk_users(self, user_type, count, password, batch, rng=None, regions=None):
+        def location():
+            if not regions:
+                return {}
+            return {
+                'region': rng.choice(regions),
+                'latitude': rng.uniform(*KENYA_LAT),
+                'longitude': rng.uniform(*KENYA_LNG),
+            }
+
+        return User.objects.bulk_create([
+            User(
+                username=f'{BENCH_PREFIX}{user_type}-{i}',
+                email=f'{user_type}-{i}@{BENCH_EMAIL_DOMAIN}',
+                password=password,
+                user_type=user_type,
+                is_verified=rng.random() < 0.7 if rng else True,
+                **location(),
+            )
+            for i in range(count)
+        ], batch_size=batch)
@@ -0,0 +1,178 @@
+"""
+In-process load driver for the public API routes.
+
+Each worker thread owns a Django test `Client` (full middleware + URL
+routing, no network) authenticated with a real JWT, and replays one
+scenario against `seed_benchmark_data` rows. Every request is timed and
+its SQL statements counted with `connection.execute_wrapper`.
+"""
+import abc
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+
+from products.models import Product
+from users.tokens import ClaimsRefreshToken
+from .data import benchmark_users
+
+
+class Scenario(abc.ABC):
+    name = None
+
+    def __init__(self, rng, product_ids):
+        self.rng = rng
+        self.product_ids = product_ids
+
+    @abc.abstractmethod
+    def requests(self):
+        """Yield (method, path, json body or None) for one iteration."""
+
+
+class CatalogScenario(Scenario):
+    name = 'catalog'
+
+    def requests(self):
+        roll = self.rng.random()
+        if roll < 0.4:
+            yield 'get', f'/api/products/?page={self.rng.randint(1, 10)}', None
+        elif roll < 0.6:
+            yield 'get', f'/api/products/?search={self.rng.choice(["tom", "kale", "fresh mango"])}', None
+        elif roll < 0.8:
+            yield 'get', '/api/products/?pagination=cursor&ordering=price', None
+        else:
+            yield 'get', f'/api/products/{self.rng.choice(self.product_ids)}/', None
+
+
+class CartScenario(Scenario):
+    name = 'cart'
+
+    def requests(self):
+        yield 'post', '/api/cart/items/', {'product': self.rng.choice(self.product_ids), 'quantity': 1}
+        yield 'get', '/api/cart/items/', None
+
+
+class CheckoutScenario(Scenario):
+    name = 'checkout'
+
+    def requests(self):
+        lines = self.rng.sample(self.product_ids, self.rng.randint(1, 5))
+        yield 'post', '/api/checkout/', {
+            'delivery_address': 'bench-address',
+            'cart_items': [{'product_id': pid, 'quantity': 1} for pid in lines],
+        }
+
+
+class OrdersScenario(Scenario):
+    name = 'orders'
+
+    def requests(self):
+        yield 'get', '/api/orders/', None
+
+
+class DirectoryScenario(Scenario):
+    name = 'directory'
+
+    def requests(self):
+        county = f'bench-county-{self.rng.randrange(47)}'
+        yield 'get', f'/api/farmers/?region={county}&verified=true&has_products=true', None
+        lat, lng = self.rng.uniform(-4.7, 4.6), self.rng.uniform(33.9, 41.9)
+        yield 'get', f'/api/farmers/?near={lat:.4f},{lng:.4f}&radius_km=10&has_products=true', None
+
+
+SCENARIOS = {
+    cls.name: cls
+    for cls in (CatalogScenario, CartScenario, CheckoutScenario, OrdersScenario, DirectoryScenario)
+}
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def run_scenario(name, concurrency, iterations, seed=0, product_sample=5000):
+    """Run `iterations` scenario iterations per worker; return a result dict."""
+    product_ids = list(
+        Product.objects.filter(sku__startswith='bench-', is_available=True)
+        .order_by('id')
+        .values_list('id', flat=True)[:product_sample]
+    )
+    users = list(benchmark_users().filter(user_type='consumer').order_by('id')[:concurrency])
+    if not product_ids or len(users) < concurrency:
+        raise RuntimeError('Not enough benchmark data; run seed_benchmark_data first')
+
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        scenario = SCENARIOS[name](rng, product_ids)
+        # 5xx (e.g. lock timeouts) are counted as errors, not raised
+        client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(users[index]).access_token}')
+        local_latencies, local_queries, local_errors = [], [], 0
+        try:
+            for _ in range(iterations):
+                for method, path, body in scenario.requests():
+                    counter = [0]
+
+                    def count(execute, sql, params, many, context):
+                        counter[0] += 1
+                        return execute(sql, params, many, context)
+
+                    started = time.perf_counter()
+                    with connection.execute_wrapper(count):
+                        if body is None:
+                            response = getattr(client, method)(path)
+                        else:
+                            response = getattr(client, method)(path, body, content_type='application/json')
+                    local_latencies.append((time.perf_counter() - started) * 1000)
+                    local_queries.append(counter[0])
+                    local_errors += response.status_code >= 400
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            errors.append(local_errors)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """List of human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {result[metric]} > baseline {base[metric]}')
+        if result['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput_rps']} < baseline {base['throughput_rps']}"
+            )
+        if result['queries_per_request'] > base['queries_per_request'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: queries/request {result['queries_per_request']} > baseline {base['queries_per_request']}"
+            )
+    return regressions
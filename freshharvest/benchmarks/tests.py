@@ -0,0 +1,37 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from .runner import SCENARIOS, Scenario, run_scenario
+
+
+class BenchmarkSmokeTestCase(TransactionTestCase):
+    """Tiny seed (10 catalog pages) + short runs, so the harness keeps working as the API changes."""
+
+    def setUp(self):
+        call_command(
+            'seed_benchmark_data', farmers=3, categories=2, products=200, buyers=2, orders=5, stdout=StringIO()
+        )
+
+    def test_scenarios_run_without_errors(self):
+        for name in SCENARIOS:
+            # One worker: this checks the harness still drives the API, not timings
+            result = run_scenario(name, concurrency=1, iterations=3)
+            self.assertGreater(result['requests'], 0, name)
+            self.assertEqual(result['errors'], 0, name)
+
+    def test_command_saves_and_compares_a_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            options = {'scenario': ['orders'], 'concurrency': 1, 'iterations': 2, 'stdout': StringIO()}
+            call_command('run_benchmarks', baseline=str(baseline), save_baseline=True, **options)
+            self.assertIn('orders', json.loads(baseline.read_text()))
+            call_command('run_benchmarks', baseline=str(baseline), tolerance=100, **options)
+
+    def test_scenarios_must_define_requests(self):
+        with self.assertRaises(TypeError):
+            type('Empty', (Scenario,), {'name': 'empty'})(None, [])
@@ -0,0 +1,107 @@
+"""
+Admin helpers for the large tables (users, products, orders, cart items).
+
+- `EstimatedCountPaginator` counts exactly up to
+  `ADMIN_ESTIMATED_COUNT_THRESHOLD` rows (a COUNT over a LIMITed subquery,
+  which stops there) and only beyond that asks the PostgreSQL planner for
+  its row estimate (EXPLAIN, no table scan).
+- `AutocompleteFilter` is a related-field list filter that renders a
+  select2 box backed by the admin autocomplete view instead of one link per
+  related row, so the sidebar never loads every user.
+- `LargeTableAdminMixin` wires both in and skips the second, unfiltered
+  COUNT(*) the changelist runs for "N results (M total)".
+"""
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms import ModelChoiceField
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """Planner row estimate for `queryset`, or None off PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Exact counts for small results, planner estimates for large ones. An
+    overestimate only means the last page(s) come back empty.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            threshold = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000)
+            exact = self.object_list.order_by()[:threshold + 1].count()
+            if exact <= threshold:
+                return exact
+            estimate = estimated_count(self.object_list)
+            if estimate is not None:
+                # Never below the rows already seen
+                return max(estimate, exact)
+        return super().count
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    `list_filter = [('user', AutocompleteFilter)]`. Only the selected rows
+    are loaded; the related model's admin must define `search_fields`.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.model_admin = model_admin
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        try:
+            return field.get_choices(
+                include_blank=False, limit_choices_to={f'{field.target_field.name}__in': self.lookup_val}
+            )
+        except (ValueError, ValidationError):
+            # Bad ids surface as the changelist's own lookup error
+            return []
+
+    def has_output(self):
+        return True
+
+    @property
+    def widget_id(self):
+        return f'autocomplete-filter-{self.field_path}'
+
+    def widget_html(self):
+        widget = AutocompleteSelect(self.field, self.model_admin.admin_site, attrs={'id': self.widget_id})
+        choices = ModelChoiceField(
+            self.field.remote_field.model._default_manager.all(),
+            to_field_name=self.field.target_field.name, widget=widget,
+        )
+        return choices.widget.render(self.lookup_kwarg, self.lookup_val[0] if self.lookup_val else None)
+
+
+class LargeTableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(f, tuple) and issubclass(f[1], AutocompleteFilter) for f in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+        return media
@@ -0,0 +1,257 @@
+"""
+Per-endpoint query/latency instrumentation.
+
+`QueryInstrumentationMiddleware` records, for every request, the SQL query
+count and DB time (via `connection.execute_wrapper`, so DEBUG is not
+needed), the view time, the serialize time (serializer `.data`), the render
+time (DRF encoding `response.data` as JSON) and the total latency, keyed by
+URL name (e.g. `order-list`).
+
+Serialize time is what views spend in `serializer_data()`:
+`SerializerTimingMixin` routes the generic `list`/`retrieve` through it,
+and hand-built responses call it directly. It is taken out of the view
+time; queries a serializer triggers still count in `queries`/`db_ms`.
+
+`PERFORMANCE_BUDGETS` maps URL names (or `'*'`) to limits on any of the
+metrics (usually `queries`, `db_ms` and `total_ms`). Overruns are logged on the `freshharvest.performance`
+logger, or raise `PerformanceBudgetExceeded` when
+`PERFORMANCE_BUDGETS_STRICT` is on (tests).
+
+The middleware runs natively under both WSGI and ASGI, so async views
+are not pushed back onto the sync thread pool.
+
+Aggregates are kept in-process and served to admins by
+`PerformanceSummaryView`.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger('freshharvest.performance')
+
+METRICS = ('queries', 'db_ms', 'view_ms', 'serialize_ms', 'render_ms', 'total_ms')
+
+# The instrumented request's marks; copied into sync_to_async threads
+_marks = contextvars.ContextVar('perf_marks', default=None)
+
+
+class PerformanceBudgetExceeded(AssertionError):
+    pass
+
+
+class _Stats:
+    """Thread-safe in-process aggregates per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, sample, over_budget):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                'count': 0,
+                'over_budget': 0,
+                **{f'{m}_total': 0.0 for m in METRICS},
+                **{f'{m}_max': 0.0 for m in METRICS},
+            })
+            entry['count'] += 1
+            entry['over_budget'] += bool(over_budget)
+            for metric in METRICS:
+                entry[f'{metric}_total'] += sample[metric]
+                entry[f'{metric}_max'] = max(entry[f'{metric}_max'], sample[metric])
+
+    def summary(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'count': entry['count'],
+                    'over_budget': entry['over_budget'],
+                    **{f'{m}_avg': round(entry[f'{m}_total'] / entry['count'], 2) for m in METRICS},
+                    **{f'{m}_max': round(entry[f'{m}_max'], 2) for m in METRICS},
+                }
+                for endpoint, entry in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+stats = _Stats()
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+def serializer_data(serializer):
+    """`serializer.data`, timed as the current request's serialize_ms."""
+    marks = _marks.get()
+    if marks is None:
+        return serializer.data
+    started = time.perf_counter()
+    try:
+        return serializer.data
+    finally:
+        marks['serialize'] = marks.get('serialize', 0.0) + time.perf_counter() - started
+
+
+class SerializerTimingMixin:
+    """Generic `list`/`retrieve` with the serializer's `.data` in serialize_ms."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_data(self.get_serializer(page, many=True)))
+        return Response(serializer_data(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serializer_data(self.get_serializer(self.get_object())))
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+def budget_overruns(endpoint, sample):
+    budgets = getattr(settings, 'PERFORMANCE_BUDGETS', {})
+    budget = budgets.get(endpoint, budgets.get('*', {}))
+    return [
+        f'{metric}={sample[metric]:g} > {limit:g}'
+        for metric, limit in budget.items()
+        if metric in sample and sample[metric] > limit
+    ]
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True):
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        request._perf_marks = {'start': time.perf_counter()}
+        token = _marks.set(request._perf_marks)
+        try:
+            with ExitStack() as stack:
+                self.install(stack, recorder)
+                response = self.get_response(request)
+        finally:
+            _marks.reset(token)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True):
+            return await self.get_response(request)
+
+        # The async ORM runs queries through thread-sensitive sync_to_async,
+        # i.e. on the request's own sync thread: hook the connections there.
+        recorder = _QueryRecorder()
+        request._perf_marks = {'start': time.perf_counter()}
+        token = _marks.set(request._perf_marks)
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _marks.reset(token)
+        return self.finish(request, response, recorder)
+
+    def install(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def finish(self, request, response, recorder):
+        end = time.perf_counter()
+        marks = request._perf_marks
+        view_start = marks.get('view_start', marks['start'])
+        view_end = marks.get('view_end', end)
+        serialize = marks.get('serialize', 0.0)
+        sample = {
+            'queries': recorder.queries,
+            'db_ms': recorder.db_seconds * 1000,
+            'view_ms': (view_end - view_start - serialize) * 1000,
+            'serialize_ms': serialize * 1000,
+            'render_ms': (end - view_end) * 1000 if 'view_end' in marks else 0.0,
+            'total_ms': (end - marks['start']) * 1000,
+        }
+        endpoint = f'{request.method} {endpoint_name(request)}'
+        overruns = budget_overruns(endpoint_name(request), sample)
+        stats.record(endpoint, sample, overruns)
+
+        if settings.DEBUG:
+            response['Server-Timing'] = ', '.join(
+                f'{metric[:-3]};dur={sample[metric]:.1f}' for metric in METRICS if metric.endswith('_ms')
+            )
+            response['X-DB-Queries'] = str(sample['queries'])
+
+        if overruns:
+            message = f'{endpoint} over budget: {", ".join(overruns)}'
+            if getattr(settings, 'PERFORMANCE_BUDGETS_STRICT', False):
+                raise PerformanceBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, '_perf_marks'):
+            request._perf_marks['view_start'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render after this hook; the rest is render time
+        if hasattr(request, '_perf_marks'):
+            request._perf_marks['view_end'] = time.perf_counter()
+        return response
+
+
+class PerformanceSummaryView(APIView):
+    """
+    **Performance Summary (admin)**
+
+    Per-endpoint averages and maxima for query count, DB, view, serialize,
+    render and total time since start-up (this worker only). DELETE resets.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'budgets': getattr(settings, 'PERFORMANCE_BUDGETS', {}),
+            'endpoints': stats.summary(),
+        })
+
+    def delete(self, request):
+        stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,190 @@
+"""
+Pagination classes shared by the catalog and order endpoints.
+
+`SwitchablePagination` keeps the default `PageNumberPagination` behaviour
+(count + page links) and switches to `KeysetPagination` when the request
+asks for it (`?pagination=cursor` or any `?cursor=`), or when the view sets
+`pagination_mode = 'cursor'`.
+
+Keyset pages never run COUNT(*) or OFFSET: each page is a range scan on
+(ordering field, id), so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import F
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (ordering field, id).
+
+    The ordering field comes from the view's `OrderingFilter` (`?ordering=`,
+    first field only) or `view.cursor_ordering`; `id` is appended in the same
+    direction as a unique tiebreaker.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if any(issubclass(backend, OrderingFilter) for backend in getattr(view, 'filter_backends', [])):
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        field = ordering[0] if ordering else getattr(view, 'cursor_ordering', self.default_ordering)
+        tiebreaker = '-id' if field.startswith('-') else 'id'
+        return (field, tiebreaker)
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()).decode())
+            values, reverse = payload['v'], bool(payload['r'])
+            if len(values) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def position_filter(self, values, reverse):
+        """
+        Row-value `(field, id) > (v, last_id)` (`<` when walking backwards
+        through an ascending order, or forwards through a descending one).
+        Both columns always sort the same way, so PostgreSQL runs it as one
+        range scan on the (field, id) index.
+        """
+        field = self.ordering[0]
+        name, descending = field.lstrip('-'), field.startswith('-')
+        lookup = TupleLessThan if descending != reverse else TupleGreaterThan
+        return lookup(Tuple(F(name), F('id')), values)
+
+    def position_of(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif not isinstance(value, (int, str)):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        values, reverse = self.decode_cursor(request)
+
+        order_by = self.ordering
+        if reverse:
+            order_by = [f[1:] if f.startswith('-') else f'-{f}' for f in order_by]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.position_filter(values, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            if has_more or reverse:
+                self.next_position = self.position_of(rows[-1])
+            if values is not None and (has_more or not reverse):
+                self.previous_position = self.position_of(rows[0])
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position, False)
+        )
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.previous_position, True)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SwitchablePagination(BasePagination):
+    """Page numbers by default; keyset cursors on request or per view."""
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.active = self.page_number
+
+    def wants_cursor(self, request, view):
+        if getattr(view, 'pagination_mode', None) == 'cursor':
+            return True
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active = self.keyset if self.wants_cursor(request, view) else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Set to 'cursor' for keyset pagination (no count, stable deep pages).",
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            {
+                'name': self.keyset.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor returned in the previous keyset page.',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -41,8 +41,10 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'products',
     'orders',
+    'benchmarks',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -54,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
+    'freshharvest.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,7 +71,7 @@ ROOT_URLCONF = 'freshharvest.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -97,12 +100,27 @@ DATABASES = {
     }
 }
 
+# Cache (catalog responses); point at Redis/Memcached in production
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'freshharvest',
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = 300
+
+# Product ?search= backend: 'postgres' (ranked full-text, trigram fallback) or 'ilike'
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'postgres')
+# Matches ranked per search; broader searches rank (and count) only this many
+PRODUCT_SEARCH_CANDIDATES = int(os.getenv('PRODUCT_SEARCH_CANDIDATES', 1000))
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -129,6 +147,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Tunable PBKDF2 first: hashes at another iteration count (or from another
+# hasher) are upgraded at the next login
+PASSWORD_HASHERS = [
+    'users.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '1200000'))
+
+# Password hashing process pool (users.hashing): worker processes (0 =
+# hash inline) and hashes allowed in flight before logins get a 503
+# (default: 8 per worker)
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '2'))
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv('PASSWORD_HASHING_MAX_PENDING', PASSWORD_HASHING_WORKERS * 8))
+
+AUTHENTICATION_BACKENDS = ['users.backends.PooledPasswordBackend']
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -180,8 +216,17 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.ClaimsTokenRefreshSerializer",
 }
 
+# Seconds a user's auth state (is_active, user_type, is_verified, staff
+# flags) is cached for ClaimsJWTAuthentication's revocation check; dropped on
+# every User save. The drop only reaches the process's own cache: behind
+# several workers CACHES['default'] must be shared (Redis/Memcached), or a
+# deactivated user stays signed in on the other workers for up to this long.
+AUTH_STATE_CACHE_TIMEOUT = 60
+
 # Spectacular setting
 
 SPECTACULAR_SETTINGS = {
@@ -194,4 +239,47 @@ SPECTACULAR_SETTINGS = {
         'persistAuthorization': True,
     },
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+# Checkout stock reservation: 'lock' (SELECT ... FOR UPDATE NOWAIT) or
+# 'optimistic' (guarded UPDATE with bounded retry)
+CHECKOUT_STOCK_RESERVATION = os.getenv('CHECKOUT_STOCK_RESERVATION', 'lock')
+CHECKOUT_RESERVATION_RETRIES = 3
+
+# Product ranking (products.ranking, ?ordering=-rank_score): component
+# weights and tuning; scores are refreshed by `manage.py refresh_rank_scores`
+PRODUCT_RANKING_WEIGHTS = {'freshness': 0.4, 'availability': 0.2, 'price': 0.15, 'popularity': 0.25}
+PRODUCT_RANKING_FRESHNESS_DAYS = 14
+PRODUCT_RANKING_LOW_STOCK = 10
+PRODUCT_RANKING_POPULARITY_DAYS = 30
+PRODUCT_RANKING_POPULARITY_HALF = 20
+
+# Admin at scale (freshharvest.admin_utils): changelists above this many
+# rows show the planner's estimate instead of COUNT(*); categories with
+# more products than the inline limit link to the product changelist
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+ADMIN_CATEGORY_INLINE_LIMIT = 50
+
+# Bulk product import: rows validated + upserted per chunk
+PRODUCT_IMPORT_CHUNK_SIZE = 1000
+
+# Live stock SSE stream (products.stream): per-connection backlog in event
+# batches before a `resync`, and keep-alive comment interval in seconds
+STOCK_STREAM_QUEUE_SIZE = 100
+STOCK_STREAM_HEARTBEAT = 15
+
+# Per-endpoint instrumentation (freshharvest.instrumentation). Budgets are
+# keyed by URL name ('*' = default); limits on queries, db_ms, total_ms.
+# Overruns log a warning, or raise when PERFORMANCE_BUDGETS_STRICT is on.
+PERFORMANCE_INSTRUMENTATION = True
+PERFORMANCE_BUDGETS_STRICT = False
+PERFORMANCE_BUDGETS = {
+    'product-list': {'queries': 4, 'total_ms': 300},
+    'product-detail': {'queries': 3, 'total_ms': 200},
+    'product-list-async': {'queries': 2, 'total_ms': 300},
+    'product-detail-async': {'queries': 1, 'total_ms': 200},
+    'order-list': {'queries': 5, 'total_ms': 300},
+    'order-detail': {'queries': 4, 'total_ms': 200},
+    'checkout': {'queries': 11, 'total_ms': 500},
+    # 3 rollup reads + the auth-state read on a cache miss
+    'farmer-sales': {'queries': 4, 'total_ms': 200},
+}
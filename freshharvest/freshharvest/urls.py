@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView
+from freshharvest.instrumentation import PerformanceSummaryView
 from drf_spectacular.views import (
     SpectacularAPIView, 
     SpectacularSwaggerView, 
@@ -29,6 +30,7 @@ urlpatterns = [
     path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/products/', include('products.urls')),
     path('api/', include('orders.urls')),
+    path('api/perf/summary/', PerformanceSummaryView.as_view(), name='perf-summary'),
 
     #swagger urls
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
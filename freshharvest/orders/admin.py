@@ -1,24 +1,64 @@
-from django.contrib import admin
-from .models import Order, OrderItem, CartItem
+from django.contrib import admin, messages
+from freshharvest.admin_utils import AutocompleteFilter, LargeTableAdminMixin
+from .models import Order, OrderItem, OrderStatusHistory, CartItem
+from .status import TRANSITIONS, transition_orders
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    autocomplete_fields = ['product']
     readonly_fields = ['price_at_purchase']
 
+class OrderStatusHistoryInline(admin.TabularInline):
+    model = OrderStatusHistory
+    extra = 0
+    can_delete = False
+    readonly_fields = ['from_status', 'to_status', 'changed_by', 'note', 'created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('changed_by')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+def transition_action(target):
+    def action(modeladmin, request, queryset):
+        result = transition_orders(queryset.values_list('id', flat=True), target, changed_by=request.user)
+        modeladmin.message_user(request, f"{len(result['updated'])} order(s) marked {target}.")
+        if result['rejected']:
+            modeladmin.message_user(
+                request, f"{len(result['rejected'])} order(s) skipped: status does not allow {target}.",
+                level=messages.WARNING,
+            )
+    action.__name__ = f'mark_{target}'
+    action.short_description = f'Mark selected orders as {target}'
+    return action
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'user', 'total_amount', 'status', 'delivery_address', 'created_at']
-    list_filter = ['status', 'created_at', 'user']
-    readonly_fields = ['created_at']
-    inlines = [OrderItemInline] 
+    list_filter = ['status', 'created_at', ('user', AutocompleteFilter)]
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
+    # Min/max and the drill-down read idx_order_created_at
+    date_hierarchy = 'created_at'
+    # Status only changes through the state machine (actions below)
+    readonly_fields = ['created_at', 'status']
+    inlines = [OrderItemInline, OrderStatusHistoryInline]
+    actions = [transition_action(target) for target in sorted(set().union(*TRANSITIONS.values()))]
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['order', 'product', 'quantity', 'price_at_purchase']
     list_filter = ['order__status']
+    # Order.__str__ reads the user, Product.__str__ the category and farmer
+    list_select_related = ['order__user', 'product__category', 'product__farmer']
+    raw_id_fields = ['order']
+    autocomplete_fields = ['product']
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'product', 'quantity', 'updated_at']
-    list_filter = ['user']
+    list_filter = [('user', AutocompleteFilter)]
+    list_select_related = ['user', 'product__category', 'product__farmer']
+    autocomplete_fields = ['user', 'product']
@@ -0,0 +1,110 @@
+"""
+Bulk cart mutation.
+
+A list of `{product, quantity, mode}` operations is folded into one final
+change per product and applied with at most three statements on the
+(user, product) unique constraint: one `INSERT ... ON CONFLICT DO UPDATE
+SET quantity = quantity + EXCLUDED.quantity` for increments (so concurrent
+increments of the same line add up, whether or not it existed), one
+`bulk_create(update_conflicts=True)` overwrite for `set` lines, and one
+DELETE. Line quantities are capped at `MAX_QUANTITY`.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CartItem
+
+MODE_SET = 'set'
+MODE_INCREMENT = 'increment'
+MODE_REMOVE = 'remove'
+MODES = (MODE_SET, MODE_INCREMENT, MODE_REMOVE)
+
+# Per cart line; also the serializers' max_value
+MAX_QUANTITY = 10_000
+
+
+def fold_operations(operations):
+    """
+    Reduce operations (applied in order) to {product_id: (mode, quantity)},
+    where mode is `set` or `increment`, or None for removal.
+    """
+    changes = {}
+    for op in operations:
+        product_id, quantity, mode = op['product'], op['quantity'], op['mode']
+        if mode == MODE_REMOVE or (mode == MODE_SET and quantity == 0):
+            changes[product_id] = None
+        elif mode == MODE_SET:
+            changes[product_id] = (MODE_SET, quantity)
+        else:
+            previous = changes.get(product_id, (MODE_INCREMENT, 0))
+            if previous is None:
+                # Increment after a removal starts again from zero
+                changes[product_id] = (MODE_SET, quantity)
+            else:
+                changes[product_id] = (previous[0], previous[1] + quantity)
+    return changes
+
+
+def _upsert_increments(user, increments):
+    """Add `{product_id: quantity}` onto `user`'s lines, creating missing ones."""
+    ops = connection.ops
+    table = ops.quote_name(CartItem._meta.db_table)
+    now = ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for product_id, quantity in increments.items():
+        params += [user.pk, product_id, quantity, now, now]
+    values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(increments))
+    total = f'{table}.quantity + EXCLUDED.quantity'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, product_id, quantity, created_at, updated_at) VALUES {values} '
+            f'ON CONFLICT (user_id, product_id) DO UPDATE SET '
+            f'quantity = CASE WHEN {total} > {MAX_QUANTITY} THEN {MAX_QUANTITY} ELSE {total} END, '
+            f'updated_at = EXCLUDED.updated_at',
+            params,
+        )
+
+
+def apply_cart_operations(user, operations):
+    """Apply `operations` to `user`'s cart in one transaction."""
+    changes = fold_operations(operations)
+    increments, rows, removals = {}, [], []
+    for product_id, change in changes.items():
+        if change is None:
+            removals.append(product_id)
+            continue
+        mode, quantity = change
+        quantity = min(quantity, MAX_QUANTITY)
+        if mode == MODE_INCREMENT:
+            if quantity > 0:
+                increments[product_id] = quantity
+        elif quantity > 0:
+            rows.append(CartItem(user=user, product_id=product_id, quantity=quantity))
+
+    with transaction.atomic():
+        if increments:
+            _upsert_increments(user, increments)
+        if rows:
+            CartItem.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'product'],
+                update_fields=['quantity', 'updated_at'],
+            )
+        if removals:
+            CartItem.objects.filter(user=user, product_id__in=removals).delete()
+
+
+def cart_summary(user):
+    """Lines with subtotals plus whole-cart totals, from one query."""
+    lines = list(CartItem.objects.filter(user=user).with_cart_totals())
+    first = lines[0] if lines else None
+    return {
+        'line_count': first.cart_lines if first else 0,
+        'item_count': first.cart_quantity if first else 0,
+        'total': first.cart_total if first else Decimal('0.00'),
+        'unavailable_lines': first.cart_unavailable if first else 0,
+        'lines': lines,
+    }
@@ -0,0 +1,226 @@
+"""
+Checkout engine: stock reservation + order creation.
+
+Two reservation strategies, picked with `settings.CHECKOUT_STOCK_RESERVATION`:
+
+- `lock` (default): SELECT ... FOR UPDATE NOWAIT on the basket's products,
+  validate, then deduct. A buyer that collides with another checkout fails
+  at once.
+- `optimistic`: no row locks are taken up front. Stock is deducted with one
+  guarded UPDATE (still available, `stock_quantity >= q` and unchanged
+  price per line). When the guard misses because of a concurrent change or
+  a deadlock the reservation is retried, at most
+  `CHECKOUT_RESERVATION_RETRIES` times.
+
+Both strategies run a fixed number of queries whatever the basket size.
+
+`checkout_cart` converts the user's persisted `CartItem`s into an order
+and clears them in the same transaction. Every order also adds its units
+and revenue to the farmer sales rollups (`orders.sales`) in one upsert.
+"""
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import BooleanField, Case, F, PositiveIntegerField, Q, Value, When
+
+from products.cache import invalidate_products
+from products.models import Product
+from products.stats import record_availability
+from products.stream import publish_stock_changes
+from .models import CartItem, Order, OrderItem
+from .sales import record_order_sales
+
+RESERVATION_LOCK = 'lock'
+RESERVATION_OPTIMISTIC = 'optimistic'
+
+
+class StockReservationError(Exception):
+    """Raised when one or more basket lines cannot be reserved."""
+
+    def __init__(self, failures):
+        super().__init__(failures)
+        self.failures = failures
+
+
+class EmptyCartError(Exception):
+    """Raised when checking out a cart with no items."""
+
+
+class _ReservationConflict(Exception):
+    """Guarded UPDATE matched fewer rows than expected; retry."""
+
+
+def deduct_stock(quantities, products, guard=None):
+    """
+    Deduct stock for many products in a single UPDATE.
+
+    `quantities` maps product id -> quantity bought, `products` maps id ->
+    the `Product` read before the deduction. `is_available` is recomputed
+    in the same statement (old stock > quantity bought), so the number of
+    queries does not grow with the basket size. Returns the row count; the
+    catalog cache, category stats (only for lines that sell a product out)
+    and live stock stream for those products are updated on commit.
+
+    Without a `guard`, `products` must have been read under row locks, so
+    their stock is what the UPDATE saw. A `guard` Q (optimistic checkout)
+    narrows the rows that may be updated; the read was unlocked and a
+    concurrent checkout may have lowered the stock since, so the lines that
+    sold out are re-read from the updated rows (locked until commit).
+    """
+    if not quantities:
+        return 0
+    queryset = Product.objects.filter(id__in=quantities)
+    if guard is not None:
+        queryset = queryset.filter(guard)
+    updated = queryset.update(
+        stock_quantity=Case(
+            *[When(id=pid, then=F('stock_quantity') - qty) for pid, qty in quantities.items()],
+            default=F('stock_quantity'),
+            output_field=PositiveIntegerField(),
+        ),
+        is_available=Case(
+            *[When(id=pid, stock_quantity__gt=qty, then=Value(True)) for pid, qty in quantities.items()],
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+    invalidate_products(
+        quantities,
+        categories={products[pid].category_id for pid in quantities},
+        farmers={products[pid].farmer_id for pid in quantities},
+    )
+    if guard is None:
+        sold_out = [
+            products[pid].category_id for pid, qty in quantities.items() if products[pid].stock_quantity <= qty
+        ]
+    else:
+        sold_out = Product.objects.filter(id__in=quantities, is_available=False).values_list('category_id', flat=True)
+    record_availability(sold_out, available=False)
+    publish_stock_changes(quantities)
+    return updated
+
+
+def stock_failures(quantities, products):
+    """Per-line report of basket lines that `products` cannot satisfy."""
+    failures = []
+    for pid, qty in quantities.items():
+        product = products.get(pid)
+        if product is None or not product.is_available:
+            failures.append({
+                'product_id': pid,
+                'requested': qty,
+                'available': 0,
+                'error': 'Product not available',
+            })
+        elif qty > product.stock_quantity:
+            failures.append({
+                'product_id': pid,
+                'requested': qty,
+                'available': product.stock_quantity,
+                'error': f'Insufficient stock for {product.name}',
+            })
+    return failures
+
+
+def _reserve_locking(quantities):
+    products = {
+        p.id: p for p in Product.objects.filter(id__in=quantities).select_for_update(nowait=True)
+    }
+    failures = stock_failures(quantities, products)
+    if failures:
+        raise StockReservationError(failures)
+    deduct_stock(quantities, products)
+    return products
+
+
+def _reserve_optimistic(quantities):
+    retries = getattr(settings, 'CHECKOUT_RESERVATION_RETRIES', 3)
+    for attempt in range(retries + 1):
+        products = {p.id: p for p in Product.objects.filter(id__in=quantities)}
+        failures = stock_failures(quantities, products)
+        if failures:
+            raise StockReservationError(failures)
+
+        guard = reduce(or_, (
+            Q(id=pid, is_available=True, stock_quantity__gte=qty, price=products[pid].price)
+            for pid, qty in quantities.items()
+        ))
+        try:
+            with transaction.atomic():
+                if deduct_stock(quantities, products, guard) != len(quantities):
+                    raise _ReservationConflict
+        except (_ReservationConflict, OperationalError):
+            continue
+        return products
+
+    # Out of retries: report against the latest committed stock.
+    products = {p.id: p for p in Product.objects.filter(id__in=quantities)}
+    failures = stock_failures(quantities, products) or [{
+        'product_id': pid,
+        'requested': qty,
+        'available': products[pid].stock_quantity,
+        'error': 'Stock changed during checkout, please retry',
+    } for pid, qty in quantities.items()]
+    raise StockReservationError(failures)
+
+
+RESERVATION_STRATEGIES = {
+    RESERVATION_LOCK: _reserve_locking,
+    RESERVATION_OPTIMISTIC: _reserve_optimistic,
+}
+
+
+def reserve_stock(quantities, strategy=None):
+    """
+    Reserve (deduct) stock for `quantities` and return {id: Product}.
+
+    Must run inside a transaction. Raises StockReservationError with a
+    per-line report when the basket cannot be satisfied.
+    """
+    strategy = strategy or getattr(settings, 'CHECKOUT_STOCK_RESERVATION', RESERVATION_LOCK)
+    return RESERVATION_STRATEGIES[strategy](quantities)
+
+
+def _create_order(user, quantities, delivery_address, order_notes, strategy):
+    products = reserve_stock(quantities, strategy)
+    total_amount = sum(
+        (products[pid].price * qty for pid, qty in quantities.items()), Decimal('0.00')
+    )
+    order = Order.objects.create(
+        user=user,
+        total_amount=total_amount,
+        delivery_address=delivery_address,
+        order_notes=order_notes,
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=products[pid], quantity=qty, price_at_purchase=products[pid].price)
+        for pid, qty in quantities.items()
+    ])
+    record_order_sales(order, quantities, products)
+    return order
+
+
+def place_order(user, quantities, delivery_address, order_notes='', strategy=None):
+    """Reserve stock and create the Order + OrderItems in one transaction."""
+    with transaction.atomic():
+        return _create_order(user, quantities, delivery_address, order_notes, strategy)
+
+
+def checkout_cart(user, delivery_address, order_notes='', strategy=None):
+    """
+    Turn `user`'s cart into an order in one transaction: lock the cart rows,
+    reserve stock, create the order and delete the ordered lines. Statement
+    count does not depend on the number of lines.
+    """
+    with transaction.atomic():
+        cart = CartItem.objects.filter(user=user)
+        # Row locks stop a second concurrent checkout of the same cart
+        quantities = dict(cart.select_for_update().values_list('product_id', 'quantity'))
+        if not quantities:
+            raise EmptyCartError
+        order = _create_order(user, quantities, delivery_address, order_notes, strategy)
+        cart.filter(product_id__in=quantities).delete()
+    return order
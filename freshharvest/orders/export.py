@@ -0,0 +1,61 @@
+"""
+Streaming order history export (CSV or NDJSON).
+
+One query joins OrderItem -> Order -> Product and is read through a
+server-side cursor (`iterator(chunk_size=...)`); rows are grouped into
+orders on the fly, so memory and time-to-first-byte do not depend on the
+size of the history.
+"""
+import csv
+import io
+import json
+from itertools import groupby
+
+from .models import OrderItem
+
+FORMATS = ('csv', 'ndjson')
+ORDER_FIELDS = ['order_id', 'created_at', 'status', 'total_amount', 'delivery_address', 'order_notes']
+ITEM_FIELDS = ['product_id', 'product_name', 'quantity', 'price_at_purchase']
+CSV_HEADER = ORDER_FIELDS + ITEM_FIELDS + ['subtotal']
+
+
+def order_item_rows(orders, chunk_size=2000):
+    """Flat (order fields..., item fields...) tuples, newest order first."""
+    return OrderItem.objects.filter(order__in=orders).order_by(
+        '-order__created_at', '-order_id', 'id'
+    ).values_list(
+        'order_id', 'order__created_at', 'order__status', 'order__total_amount',
+        'order__delivery_address', 'order__order_notes',
+        'product_id', 'product__name', 'quantity', 'price_at_purchase',
+    ).iterator(chunk_size=chunk_size)
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_orders(orders, file_format):
+    """Yield the encoded export for the `orders` queryset."""
+    rows = order_item_rows(orders)
+    split = len(ORDER_FIELDS)
+
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def encode(values):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(values)
+            return buffer.getvalue()
+
+        yield encode(CSV_HEADER)
+        for row in rows:
+            quantity, price = row[-2], row[-1]
+            yield encode([_plain(v) for v in row] + [price * quantity])
+        return
+
+    for order_values, items in groupby(rows, key=lambda row: row[:split]):
+        order = dict(zip(ORDER_FIELDS, map(_plain, order_values)))
+        order['items'] = [dict(zip(ITEM_FIELDS, item[split:])) for item in items]
+        yield json.dumps(order, default=str) + '\n'
@@ -0,0 +1,93 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from orders.checkout import RESERVATION_STRATEGIES, StockReservationError, place_order
+from products.models import Category, Product
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency benchmark for checkout stock reservation. Runs the same "
+        "contended workload (many buyers, few hot products) against each "
+        "strategy and reports throughput and abort rate. Needs PostgreSQL; "
+        "creates its own fixture rows and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--checkouts', type=int, default=50, help='Checkouts per worker')
+        parser.add_argument('--products', type=int, default=3, help='Number of hot products')
+        parser.add_argument('--lines', type=int, default=2, help='Basket lines per checkout')
+        parser.add_argument(
+            '--strategy', action='append', choices=sorted(RESERVATION_STRATEGIES),
+            help='Strategy to run (repeatable, default: all)',
+        )
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'bench-{tag}', slug=f'bench-{tag}')
+        farmer = User.objects.create_user(
+            username=f'bench-farmer-{tag}', email=f'farmer-{tag}@bench.local',
+            password=None, user_type='farmer',
+        )
+        buyers = User.objects.bulk_create([
+            User(username=f'bench-buyer-{tag}-{i}', email=f'buyer-{tag}-{i}@bench.local')
+            for i in range(options['workers'])
+        ])
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Hot lot {i}', description='bench', price=Decimal('10.00'),
+                stock_quantity=0, category=category, farmer=farmer, harvest_date=date.today(),
+            )
+            for i in range(options['products'])
+        ])
+        try:
+            for strategy in options['strategy'] or sorted(RESERVATION_STRATEGIES):
+                self.run_strategy(strategy, buyers, products, options)
+        finally:
+            User.objects.filter(id__in=[farmer.id] + [b.id for b in buyers]).delete()
+            category.delete()
+
+    def run_strategy(self, strategy, buyers, products, options):
+        stock = options['workers'] * options['checkouts'] * options['lines']
+        Product.objects.filter(id__in=[p.id for p in products]).update(
+            stock_quantity=stock, is_available=True
+        )
+        lines = min(options['lines'], len(products))
+
+        def worker(index):
+            buyer = buyers[index]
+            ok = failed = 0
+            try:
+                for n in range(options['checkouts']):
+                    basket = {
+                        products[(index + n + k) % len(products)].id: 1 for k in range(lines)
+                    }
+                    try:
+                        place_order(buyer, basket, 'bench', strategy=strategy)
+                        ok += 1
+                    except (StockReservationError, DatabaseError):
+                        failed += 1
+            finally:
+                connection.close()
+            return ok, failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(worker, range(options['workers'])))
+        elapsed = time.perf_counter() - started
+
+        ok = sum(r[0] for r in results)
+        failed = sum(r[1] for r in results)
+        attempted = ok + failed
+        self.stdout.write(
+            f"{strategy:<12} {attempted} checkouts in {elapsed:.2f}s | "
+            f"{ok / elapsed:.1f} orders/s | abort rate {failed / attempted:.1%}"
+        )
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.sales import rebuild_sales_rollups
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the FarmerDailySales rollups from the order history "
+        "(cancelled orders excluded). Run it with checkouts quiet, or limit "
+        "it with --since to days that are no longer receiving orders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--farmer', type=int, help='Only rebuild this farmer (user id)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        farmer = None
+        if options['farmer'] is not None:
+            farmer = User.objects.filter(pk=options['farmer'], user_type='farmer').first()
+            if farmer is None:
+                raise CommandError(f"No farmer with id {options['farmer']}")
+        written = rebuild_sales_rollups(options['since'], farmer, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} daily sales rows'))
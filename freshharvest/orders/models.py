@@ -1,8 +1,68 @@
+from decimal import Decimal
+
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Coalesce
 from users.models import User
 from products.models import Product
 
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        """Prefetch items + products and annotate `total_items` (constant query count)."""
+        return self.prefetch_related(
+            models.Prefetch('order_items', queryset=OrderItem.objects.select_related('product'))
+        ).annotate(total_items=Coalesce(models.Sum('order_items__quantity'), 0))
+
+class CartItemQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Join the product and annotate `line_total` (exact Decimal price x
+        quantity) and `in_stock` in the same query.
+        """
+        return self.select_related('product').annotate(
+            line_total=models.ExpressionWrapper(
+                models.F('product__price') * models.F('quantity'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            in_stock=models.Case(
+                models.When(
+                    product__is_available=True,
+                    product__stock_quantity__gte=models.F('quantity'),
+                    then=models.Value(True),
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+    def with_cart_totals(self):
+        """
+        `with_totals()` plus whole-cart window aggregates repeated on every
+        row (`cart_total`, `cart_quantity`, `cart_lines`, `cart_unavailable`),
+        so lines and totals come back from one query.
+        """
+        return self.with_totals().annotate(
+            cart_total=models.Window(models.Sum('line_total')),
+            cart_quantity=models.Window(models.Sum('quantity')),
+            cart_lines=models.Window(models.Count('id')),
+            cart_unavailable=models.Window(models.Sum(models.Case(
+                models.When(in_stock=False, then=models.Value(1)),
+                default=models.Value(0),
+            ))),
+        )
+
+    def summary(self):
+        """Whole-cart totals only, as a single aggregate query."""
+        return self.with_totals().aggregate(
+            line_count=models.Count('id'),
+            item_count=Coalesce(models.Sum('quantity'), 0),
+            total=Coalesce(
+                models.Sum('line_total'), models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            unavailable_lines=models.Count('id', filter=models.Q(in_stock=False)),
+        )
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -20,10 +80,13 @@ class Order(models.Model):
     order_notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         indexes = [
             models.Index(fields=['user', 'created_at']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at'], name='idx_order_created_at'),
         ]
         ordering = ['-created_at']
     
@@ -47,6 +110,47 @@ class OrderItem(models.Model):
     def subtotal(self):
         return self.price_at_purchase * self.quantity
 
+class OrderStatusHistory(models.Model):
+    """Append-only log of order status transitions (see `orders.status`)."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_history')
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['order', 'created_at'])]
+        ordering = ['created_at', 'id']
+        verbose_name_plural = 'order status history'
+    
+    def __str__(self):
+        return f"Order {self.order_id}: {self.from_status} → {self.to_status}"
+
+class FarmerDailySales(models.Model):
+    """
+    Daily sales rollup per farmer x product (see `orders.sales`). Updated
+    incrementally at checkout/cancellation; `rebuild_sales_rollups`
+    recomputes it from the order history.
+    """
+    farmer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    day = models.DateField()
+    # Signed: cancellations are applied as negative increments, and a
+    # CHECK (units >= 0) would reject them before ON CONFLICT resolves
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['farmer', 'product', 'day'], name='uniq_sales_farmer_product_day'),
+        ]
+        indexes = [models.Index(fields=['farmer', 'day'], name='idx_sales_farmer_day')]
+        verbose_name_plural = 'farmer daily sales'
+    
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.units} units, KES{self.revenue}"
+
 class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -54,6 +158,8 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartItemQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'product']
         indexes = [models.Index(fields=['user', 'product'])]
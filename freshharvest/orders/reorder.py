@@ -0,0 +1,49 @@
+"""
+Reorder: rebuild a past order's basket against today's catalog.
+
+One query reads the order's items joined with the current product price,
+stock and availability. Each line is clamped to what can be bought now and
+reported as `ok`, `price_changed`, `partial` or `unavailable`. The status
+names the most severe problem only, so every line also carries a
+`price_changed` flag next to its old and current price: a short line can
+have been repriced too.
+"""
+from .models import OrderItem
+
+LINE_OK = 'ok'
+LINE_PRICE_CHANGED = 'price_changed'
+LINE_PARTIAL = 'partial'
+LINE_UNAVAILABLE = 'unavailable'
+
+
+def plan_reorder(order):
+    """Return ({product_id: quantity} that can be bought now, per-line report)."""
+    rows = OrderItem.objects.filter(order=order).order_by('id').values_list(
+        'product_id', 'product__name', 'quantity', 'price_at_purchase',
+        'product__price', 'product__stock_quantity', 'product__is_available',
+    )
+    quantities, report = {}, []
+    for product_id, name, requested, old_price, price, stock, is_available in rows:
+        available = stock if is_available else 0
+        quantity = min(requested, available)
+        if quantity == 0:
+            line_status = LINE_UNAVAILABLE
+        elif quantity < requested:
+            line_status = LINE_PARTIAL
+        elif price != old_price:
+            line_status = LINE_PRICE_CHANGED
+        else:
+            line_status = LINE_OK
+        if quantity:
+            quantities[product_id] = quantity
+        report.append({
+            'product_id': product_id,
+            'product_name': name,
+            'requested': requested,
+            'quantity': quantity,
+            'price_at_purchase': old_price,
+            'current_price': price,
+            'price_changed': price != old_price,
+            'status': line_status,
+        })
+    return quantities, report
@@ -0,0 +1,129 @@
+"""
+Farmer sales rollups (`FarmerDailySales`: farmer x product x day).
+
+Checkout adds each order's units and revenue (`price_at_purchase` x
+quantity) with one `INSERT ... ON CONFLICT DO UPDATE SET units = units +
+EXCLUDED.units` statement; cancellation subtracts them the same way. `rebuild_sales_rollups`
+recomputes a date range from the order history.
+
+The farmer dashboard reads only the rollup table, so its cost depends on
+the number of days x products in the range, not on the order history.
+"""
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import FarmerDailySales, OrderItem
+
+CANCELLED = 'cancelled'
+UPSERT_BATCH_SIZE = 500
+GRANULARITIES = ('day', 'week', 'month')
+
+REVENUE = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _upsert_increments(rows):
+    """Add (farmer_id, product_id, day, units, revenue) rows onto the rollups."""
+    ops = connection.ops
+    table = ops.quote_name(FarmerDailySales._meta.db_table)
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        params = []
+        for farmer_id, product_id, day, units, revenue in batch:
+            params += [
+                farmer_id, product_id, ops.adapt_datefield_value(day), units,
+                ops.adapt_decimalfield_value(revenue, REVENUE.max_digits, REVENUE.decimal_places),
+            ]
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (farmer_id, product_id, day, units, revenue) VALUES {values} '
+                f'ON CONFLICT (farmer_id, product_id, day) DO UPDATE SET '
+                f'units = {table}.units + EXCLUDED.units, revenue = {table}.revenue + EXCLUDED.revenue',
+                params,
+            )
+
+
+def record_order_sales(order, quantities, products):
+    """Add a freshly created order (`{product_id: qty}`, `{id: Product}`) to the rollups."""
+    day = timezone.localdate(order.created_at)
+    _upsert_increments([
+        (products[pid].farmer_id, pid, day, qty, products[pid].price * qty)
+        for pid, qty in quantities.items()
+    ])
+
+
+def _item_rollups(items):
+    return items.values(
+        'product__farmer_id', 'product_id', sale_day=TruncDate('order__created_at'),
+    ).annotate(
+        total_units=Sum('quantity'),
+        total_revenue=Sum(F('price_at_purchase') * F('quantity'), output_field=REVENUE),
+    ).order_by()
+
+
+def remove_order_sales(order_ids):
+    """Subtract cancelled orders from the rollups (one aggregate + one upsert)."""
+    rows = _item_rollups(OrderItem.objects.filter(order_id__in=order_ids))
+    _upsert_increments([
+        (row['product__farmer_id'], row['product_id'], row['sale_day'], -row['total_units'], -row['total_revenue'])
+        for row in rows
+    ])
+
+
+def rebuild_sales_rollups(since=None, farmer=None, batch_size=5000):
+    """Recompute rollups from non-cancelled orders (from `since`, for `farmer`). Returns rows written."""
+    rollups = FarmerDailySales.objects.all()
+    items = OrderItem.objects.exclude(order__status=CANCELLED)
+    if since is not None:
+        rollups = rollups.filter(day__gte=since)
+        items = items.filter(order__created_at__date__gte=since)
+    if farmer is not None:
+        rollups = rollups.filter(farmer=farmer)
+        items = items.filter(product__farmer=farmer)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in _item_rollups(items).iterator(chunk_size=batch_size):
+            batch.append(FarmerDailySales(
+                farmer_id=row['product__farmer_id'], product_id=row['product_id'], day=row['sale_day'],
+                units=row['total_units'], revenue=row['total_revenue'],
+            ))
+            if len(batch) >= batch_size:
+                written += len(FarmerDailySales.objects.bulk_create(batch))
+                batch = []
+        written += len(FarmerDailySales.objects.bulk_create(batch))
+    return written
+
+
+def sales_dashboard(farmer, start, end, granularity='day', top=10):
+    """Totals, a revenue/units series and top products for `farmer` in [start, end]."""
+    rollups = FarmerDailySales.objects.filter(farmer=farmer, day__range=(start, end))
+    zero = Value(Decimal('0.00'), output_field=REVENUE)
+    period = {'day': F('day'), 'week': TruncWeek('day'), 'month': TruncMonth('day')}[granularity]
+
+    totals = rollups.aggregate(units=Coalesce(Sum('units'), 0), revenue=Coalesce(Sum('revenue'), zero))
+    series = rollups.annotate(period=period).values('period').annotate(
+        units=Sum('units'), revenue=Sum('revenue'),
+    ).order_by('period')
+    top_products = rollups.values('product_id', 'product__name').annotate(
+        units=Sum('units'), revenue=Sum('revenue'),
+    ).order_by('-revenue', 'product_id')[:top]
+
+    return {
+        'start': start,
+        'end': end,
+        'granularity': granularity,
+        'totals': totals,
+        'series': list(series),
+        'top_products': [
+            {'product_id': row['product_id'], 'product_name': row['product__name'],
+             'units': row['units'], 'revenue': row['revenue']}
+            for row in top_products
+        ],
+    }
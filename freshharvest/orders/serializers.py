@@ -1,8 +1,13 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from decimal import Decimal
-from django.db import transaction
-from django.core.exceptions import ValidationError
-from .models import Order, OrderItem, CartItem
+from .cart import MAX_QUANTITY as MAX_CART_QUANTITY, MODE_INCREMENT, MODES as CART_MODES, apply_cart_operations
+from .checkout import EmptyCartError, checkout_cart, place_order
+from .export import FORMATS as EXPORT_FORMATS
+from .sales import GRANULARITIES as SALES_GRANULARITIES
+from .models import Order, OrderItem, OrderStatusHistory, CartItem
+from .status import predecessors
 from products.models import Product
 from products.serializers import ProductSerializer
 
@@ -17,85 +22,83 @@ class CheckoutSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         user = self.context['request'].user
-        cart_items_data = validated_data.pop('cart_items')
+        quantities = {}
+        for item in validated_data.pop('cart_items'):
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
         
-        with transaction.atomic():
-            product_ids = [item['product_id'] for item in cart_items_data]
-            products = Product.objects.filter(
-                id__in=product_ids, is_available=True
-            ).select_for_update(nowait=True)
-            
-            if len(products) != len(product_ids):
-                raise ValidationError("Product not available")
-            
-            product_dict = {p.id: p for p in products}
-            total_amount = Decimal('0.00')
-            order_items_data = []
-            
-            for item in cart_items_data:
-                product = product_dict[item['product_id']]
-                if item['quantity'] > product.stock_quantity:
-                    raise ValidationError(f"Insufficient stock for {product.name}")
-                
-                subtotal = product.price * item['quantity']
-                total_amount += subtotal
-                
-                order_items_data.append({
-                    'product': product,
-                    'quantity': item['quantity'],
-                    'price_at_purchase': product.price
-                })
-            
-            # Create Order
-            order = Order.objects.create(
-                user=user,
-                total_amount=total_amount,
+        # StockReservationError propagates: the view answers 409 with the typed failures
+        return place_order(
+            user,
+            quantities,
+            delivery_address=validated_data['delivery_address'],
+            order_notes=validated_data.get('order_notes', '')
+        )
+
+class CartCheckoutSerializer(serializers.Serializer):
+    """Checkout of the persisted server-side cart (no `cart_items` payload)."""
+    delivery_address = serializers.CharField(max_length=500)
+    order_notes = serializers.CharField(max_length=1000, required=False, allow_blank=True)
+
+    def create(self, validated_data):
+        try:
+            return checkout_cart(
+                self.context['request'].user,
                 delivery_address=validated_data['delivery_address'],
                 order_notes=validated_data.get('order_notes', '')
             )
-            
-            # Create OrderItems + Deduct Stock
-            for item_data in order_items_data:
-                OrderItem.objects.create(**item_data, order=order)
-                item_data['product'].stock_quantity -= item_data['quantity']
-                item_data['product'].save(update_fields=['stock_quantity'])
-            
-            # Update availability
-            depleted = [p for p in products if p.stock_quantity == 0]
-            Product.objects.filter(id__in=[p.id for p in depleted]).update(is_available=False)
-        
-        return order
+        except EmptyCartError:
+            raise serializers.ValidationError({'cart_items': ['Your cart is empty.']})
+
+class ReorderSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=['cart', 'checkout'], default='cart')
+    delivery_address = serializers.CharField(max_length=500, required=False)
+    order_notes = serializers.CharField(max_length=1000, required=False, allow_blank=True)
 
 class CartItemSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_price = serializers.DecimalField(source='product.price', read_only=True, max_digits=10, decimal_places=2)
     product_image = serializers.CharField(source='product.image', read_only=True)
-    subtotal = serializers.SerializerMethodField()
+    # Annotated by `CartItem.objects.with_totals()`
+    subtotal = serializers.DecimalField(source='line_total', read_only=True, max_digits=12, decimal_places=2)
+    in_stock = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = CartItem
-        fields = ['id', 'product', 'product_name', 'product_price', 'product_image', 'quantity', 'subtotal', 'created_at', 'updated_at']
-    
-    def get_subtotal(self, obj):
-        return float(obj.product.price * obj.quantity)
+        fields = ['id', 'product', 'product_name', 'product_price', 'product_image', 'quantity', 'subtotal', 'in_stock', 'created_at', 'updated_at']
+        extra_kwargs = {'quantity': {'max_value': MAX_CART_QUANTITY}}
     
     def create(self, validated_data):
         user = self.context['request'].user
         product = validated_data['product']
         quantity = validated_data.get('quantity', 1)
-        
-        cart_item, created = CartItem.objects.get_or_create(
-            user=user,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-        
-        return cart_item
+
+        # Same capped SQL upsert as the bulk endpoint: concurrent adds sum up
+        apply_cart_operations(user, [{'product': product.pk, 'quantity': quantity, 'mode': MODE_INCREMENT}])
+        return CartItem.objects.with_totals().get(user=user, product=product)
+
+class CartOperationSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, max_value=MAX_CART_QUANTITY, default=1)
+    mode = serializers.ChoiceField(choices=CART_MODES, default=MODE_INCREMENT)
+
+class BulkCartSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, min_length=1, max_length=500)
+
+    def validate_operations(self, operations):
+        # One query for the whole batch instead of a lookup per line
+        requested = {op['product'] for op in operations}
+        missing = requested - set(Product.objects.filter(id__in=requested).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(f'Unknown products: {sorted(missing)}')
+        return operations
+
+class CartSummarySerializer(serializers.Serializer):
+    line_count = serializers.IntegerField()
+    item_count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unavailable_lines = serializers.IntegerField()
+    lines = CartItemSerializer(many=True, required=False)
 
 class OrderSerializer(serializers.ModelSerializer):
     order_items = serializers.SerializerMethodField()
@@ -106,7 +109,8 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'total_amount', 'status', 'delivery_address', 'order_notes', 'created_at', 'order_items', 'total_items']
     
     def get_order_items(self, obj):
-        items = OrderItem.objects.filter(order=obj).select_related('product')
+        # Uses the `Order.objects.with_items()` prefetch when present
+        items = obj.order_items.all()
         return [{
             'product_name': item.product.name,
             'quantity': item.quantity,
@@ -115,4 +119,42 @@ class OrderSerializer(serializers.ModelSerializer):
         } for item in items]
     
     def get_total_items(self, obj):
-        return sum(item.quantity for item in obj.order_items.all())
\ No newline at end of file
+        if hasattr(obj, 'total_items'):
+            return obj.total_items
+        return sum(item.quantity for item in obj.order_items.all())
+
+class OrderExportFilterSerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(choices=EXPORT_FORMATS, default='csv')
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    created_after = serializers.DateField(required=False)
+    created_before = serializers.DateField(required=False)
+
+class OrderTransitionSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=5000)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    def validate_status(self, value):
+        if not predecessors(value):
+            raise serializers.ValidationError(f'Orders cannot be moved to {value}.')
+        return value
+
+class OrderStatusHistorySerializer(serializers.ModelSerializer):
+    changed_by = serializers.CharField(source='changed_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = OrderStatusHistory
+        fields = ['from_status', 'to_status', 'changed_by', 'note', 'created_at']
+
+class SalesDashboardFilterSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=SALES_GRANULARITIES, default='day')
+    top = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate(self, attrs):
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - timedelta(days=30))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': 'Must be on or before end.'})
+        return attrs
@@ -0,0 +1,107 @@
+"""
+Order status state machine.
+
+`TRANSITIONS` lists the statuses each status may move to. `transition_orders`
+applies one transition to a whole batch of orders with a fixed number of
+statements, whatever the batch size:
+
+1. lock the batch and read the current statuses (for the history rows and
+   the rejection report),
+2. one `UPDATE ... WHERE id IN (...) AND status IN (allowed predecessors)`,
+3. one `bulk_create` into the append-only `OrderStatusHistory`,
+4. on cancellation, one set-based UPDATE returning the ordered quantities
+   to `Product.stock_quantity`, and one aggregate + upsert taking them back
+   out of the farmer sales rollups.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, PositiveIntegerField, Subquery, Sum
+
+from products.cache import invalidate_products
+from products.models import Product
+from products.stats import record_availability
+from products.stream import publish_stock_changes
+from .models import Order, OrderItem, OrderStatusHistory
+from .sales import remove_order_sales
+
+CANCELLED = 'cancelled'
+
+TRANSITIONS = {
+    'pending': {'confirmed', CANCELLED},
+    'confirmed': {'processing', CANCELLED},
+    'processing': {'shipped', CANCELLED},
+    'shipped': {'delivered'},
+    'delivered': set(),
+    CANCELLED: set(),
+}
+
+# Statuses a buyer may still cancel from themselves
+BUYER_CANCELLABLE = {'pending', 'confirmed'}
+
+
+def predecessors(status):
+    return sorted(source for source, targets in TRANSITIONS.items() if status in targets)
+
+
+def restock(order_ids):
+    """Return the items of `order_ids` to stock in one UPDATE; returns product ids."""
+    items = OrderItem.objects.filter(order_id__in=order_ids)
+    product_ids = list(items.values_list('product_id', flat=True).distinct())
+    if not product_ids:
+        return []
+    returned = items.filter(product_id=OuterRef('pk')).values('product_id').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    products = Product.objects.filter(id__in=product_ids)
+    rows = list(products.values_list('category_id', 'farmer_id', 'is_available'))
+    products.update(
+        stock_quantity=F('stock_quantity') + Subquery(returned, output_field=PositiveIntegerField()),
+        is_available=True,
+    )
+    invalidate_products(
+        product_ids,
+        categories={category_id for category_id, _, _ in rows},
+        farmers={farmer_id for _, farmer_id, _ in rows},
+    )
+    # Sold-out products come back; their categories gain available products
+    record_availability([category_id for category_id, _, available in rows if not available], available=True)
+    publish_stock_changes(product_ids)
+    return product_ids
+
+
+def transition_orders(order_ids, status, changed_by=None, note='', allowed_from=None):
+    """
+    Move `order_ids` to `status`. Orders whose current status does not allow
+    it (or is outside `allowed_from`, when given) are left untouched and
+    reported. Returns `{'updated': [ids], 'rejected': [{order_id, status, error}]}`.
+    """
+    sources = set(predecessors(status))
+    if allowed_from is not None:
+        sources &= set(allowed_from)
+    order_ids = set(order_ids)
+
+    with transaction.atomic():
+        current = dict(
+            Order.objects.select_for_update().filter(id__in=order_ids).values_list('id', 'status')
+        )
+        eligible = sorted(pk for pk, old in current.items() if old in sources)
+        if eligible:
+            Order.objects.filter(id__in=eligible, status__in=sources).update(status=status)
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(
+                    order_id=pk, from_status=current[pk], to_status=status,
+                    changed_by=changed_by, note=note,
+                )
+                for pk in eligible
+            ])
+            if status == CANCELLED:
+                restock(eligible)
+                remove_order_sales(eligible)
+
+    rejected = [
+        {'order_id': pk, 'status': current.get(pk), 'error': (
+            'Order not found' if pk not in current
+            else f'Cannot change status from {current[pk]} to {status}'
+        )}
+        for pk in sorted(order_ids - set(eligible))
+    ]
+    return {'updated': eligible, 'rejected': rejected}
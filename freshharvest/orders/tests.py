@@ -1,3 +1,616 @@
-from django.test import TestCase
+import json
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from products.models import Category, Product
+from users.models import User
+from .cart import MAX_QUANTITY as MAX_CART_QUANTITY, apply_cart_operations
+from .checkout import deduct_stock
+from .models import CartItem, FarmerDailySales, Order, OrderItem, OrderStatusHistory
+from .sales import rebuild_sales_rollups
+
+
+class OrdersAPITestCase(APITestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='pass12345', user_type='consumer'
+        )
+        self.farmer = User.objects.create_user(
+            username='farmer', email='farmer@example.com', password='pass12345', user_type='farmer'
+        )
+        self.category = Category.objects.create(name='Vegetables')
+        self.client.force_authenticate(self.buyer)
+
+    def make_products(self, count, stock=10):
+        return [
+            Product.objects.create(
+                name=f'Produce {i}', description='Fresh', price=Decimal('50.00'),
+                stock_quantity=stock, category=self.category, farmer=self.farmer,
+                harvest_date=date.today(),
+            )
+            for i in range(count)
+        ]
+
+    def checkout(self, products, quantity=1):
+        return self.client.post('/api/checkout/', {
+            'delivery_address': 'Kilimani, House 123',
+            'cart_items': [{'product_id': p.id, 'quantity': quantity} for p in products],
+        }, format='json')
+
+
+class CheckoutTestCase(OrdersAPITestCase):
+    def test_checkout_creates_order_and_deducts_stock(self):
+        products = self.make_products(3, stock=2)
+        response = self.checkout(products[:2], quantity=2)
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, Decimal('200.00'))
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 2)
+        for product in products:
+            product.refresh_from_db()
+        self.assertEqual([p.stock_quantity for p in products], [0, 0, 2])
+        self.assertEqual([p.is_available for p in products], [False, False, True])
+
+    def test_checkout_query_count_is_independent_of_basket_size(self):
+        counts = []
+        for size in (1, 25):
+            products = self.make_products(size)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.checkout(products)
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(ctx))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_checkout_reports_each_failing_line(self):
+        products = self.make_products(3, stock=1)
+        products[2].stock_quantity = 0
+        products[2].save()
+        response = self.checkout(products, quantity=1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['cart_items'], [{
+            'product_id': products[2].id, 'requested': 1, 'available': 0, 'error': 'Product not available',
+        }])
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(CHECKOUT_STOCK_RESERVATION='optimistic')
+class OptimisticCheckoutTestCase(CheckoutTestCase):
+    def test_guarded_decrement_never_oversells(self):
+        products = self.make_products(2, stock=3)
+        response = self.client.post('/api/checkout/', {
+            'delivery_address': 'Kilimani, House 123',
+            'cart_items': [
+                {'product_id': products[0].id, 'quantity': 2},
+                {'product_id': products[1].id, 'quantity': 5},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['cart_items'][0]['available'], 3)
+        products[0].refresh_from_db()
+        self.assertEqual(products[0].stock_quantity, 3)
+
+    def test_concurrent_sell_out_is_counted_in_category_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.make_products(1, stock=5)[0]
+        stale = {product.id: Product.objects.get(pk=product.pk)}
+        # Another checkout takes 3 units after our unlocked read
+        Product.objects.filter(pk=product.pk).update(stock_quantity=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = deduct_stock({product.id: 2}, stale, Q(id=product.id, stock_quantity__gte=2))
+        self.assertEqual(updated, 1)
+        self.category.stats.refresh_from_db()
+        self.assertEqual(self.category.stats.available_count, 0)
+
+
+class CartSummaryTestCase(OrdersAPITestCase):
+    def fill_cart(self, count):
+        products = self.make_products(count, stock=3)
+        for i, product in enumerate(products):
+            product.price = Decimal('0.10') * (i + 1)
+            product.save()
+            CartItem.objects.create(user=self.buyer, product=product, quantity=3 if i else 5)
+        return products
+
+    def test_summary_totals_are_exact_and_flag_short_stock(self):
+        self.fill_cart(3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/cart/items/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'orders_cartitem' in q['sql']]), 1)
+        # 0.10*5 + 0.20*3 + 0.30*3, no float drift
+        self.assertEqual(Decimal(response.data['total']), Decimal('2.00'))
+        self.assertEqual(response.data['item_count'], 11)
+        self.assertEqual(response.data['line_count'], 3)
+        self.assertEqual(response.data['unavailable_lines'], 1)
+        flags = {line['quantity']: line['in_stock'] for line in response.data['lines']}
+        self.assertEqual(flags, {5: False, 3: True})
+
+        totals = self.client.get('/api/cart/items/summary/?lines=false').data
+        self.assertNotIn('lines', totals)
+        self.assertEqual(Decimal(totals['total']), Decimal('2.00'))
+        self.assertEqual(totals['unavailable_lines'], 1)
+
+    def test_empty_cart_summary(self):
+        response = self.client.get('/api/cart/items/summary/')
+        self.assertEqual(response.data['total'], '0.00')
+        self.assertEqual(response.data['lines'], [])
+
+    def test_cart_list_query_count_is_constant(self):
+        self.fill_cart(10)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/cart/items/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 2)  # count + page
+        self.assertIn('0.90', {line['subtotal'] for line in response.data['results']})
+
+
+class BulkCartTestCase(OrdersAPITestCase):
+    def bulk(self, operations):
+        return self.client.post('/api/cart/items/bulk/', {'operations': operations}, format='json')
+
+    def test_bulk_operations_return_new_cart_state(self):
+        a, b, c, d = self.make_products(4)
+        CartItem.objects.create(user=self.buyer, product=a, quantity=2)
+        CartItem.objects.create(user=self.buyer, product=b, quantity=2)
+        CartItem.objects.create(user=self.buyer, product=c, quantity=2)
+        response = self.bulk([
+            {'product': a.id, 'quantity': 3},
+            {'product': a.id, 'quantity': 1, 'mode': 'increment'},
+            {'product': b.id, 'quantity': 7, 'mode': 'set'},
+            {'product': c.id, 'mode': 'remove'},
+            {'product': d.id, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        quantities = dict(CartItem.objects.filter(user=self.buyer).values_list('product_id', 'quantity'))
+        self.assertEqual(quantities, {a.id: 6, b.id: 7, d.id: 1})
+        self.assertEqual(response.data['item_count'], 14)
+        self.assertEqual(Decimal(response.data['total']), Decimal('700.00'))
+        self.assertEqual(len(response.data['lines']), 3)
+
+    def test_bulk_query_count_is_independent_of_batch_size(self):
+        counts = []
+        for size in (2, 40):
+            products = self.make_products(size)
+            CartItem.objects.create(user=self.buyer, product=products[0], quantity=1)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.bulk(
+                    [{'product': p.id, 'quantity': 2} for p in products]
+                    + [{'product': products[-1].id, 'mode': 'remove'}]
+                )
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+            CartItem.objects.all().delete()
+        self.assertEqual(counts[0], counts[1])
+
+    def test_increments_add_up_in_the_database(self):
+        # No read-modify-write: a line created by a concurrent request after
+        # this one started is added to, not overwritten
+        product = self.make_products(1)[0]
+        CartItem.objects.create(user=self.buyer, product=product, quantity=4)
+        with CaptureQueriesContext(connection) as ctx:
+            apply_cart_operations(self.buyer, [{'product': product.id, 'quantity': 3, 'mode': 'increment'}])
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, 7)
+
+    def test_quantities_are_capped(self):
+        product = self.make_products(1)[0]
+        response = self.bulk([{'product': product.id, 'quantity': 2 ** 31}])
+        self.assertEqual(response.status_code, 400)
+
+        self.bulk([{'product': product.id, 'quantity': MAX_CART_QUANTITY, 'mode': 'set'}])
+        self.assertEqual(self.bulk([{'product': product.id, 'quantity': 5}]).status_code, 200)
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, MAX_CART_QUANTITY)
+
+    def test_single_adds_share_the_capped_upsert(self):
+        product = self.make_products(1)[0]
+        CartItem.objects.create(user=self.buyer, product=product, quantity=MAX_CART_QUANTITY - 1)
+        response = self.client.post('/api/cart/items/', {'product': product.id, 'quantity': 5}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['quantity'], MAX_CART_QUANTITY)
+        self.assertEqual(Decimal(response.data['subtotal']), Decimal('50.00') * MAX_CART_QUANTITY)
+
+    def test_unknown_products_are_rejected(self):
+        response = self.bulk([{'product': 999999, 'quantity': 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+
+class CartCheckoutTestCase(OrdersAPITestCase):
+    def checkout_cart(self):
+        return self.client.post('/api/cart/items/checkout/', {'delivery_address': 'Kilimani'}, format='json')
+
+    def test_cart_checkout_creates_order_and_clears_cart(self):
+        products = self.make_products(3, stock=5)
+        for product in products:
+            CartItem.objects.create(user=self.buyer, product=product, quantity=2)
+        response = self.checkout_cart()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data['total_amount']), Decimal('300.00'))
+        self.assertEqual(response.data['total_items'], 6)
+        self.assertFalse(CartItem.objects.filter(user=self.buyer).exists())
+        self.assertEqual(Product.objects.get(pk=products[0].pk).stock_quantity, 3)
+
+    def test_cart_checkout_query_count_is_independent_of_cart_size(self):
+        counts = []
+        for size in (1, 25):
+            for product in self.make_products(size):
+                CartItem.objects.create(user=self.buyer, product=product, quantity=1)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.checkout_cart().status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_failed_reservation_keeps_cart(self):
+        product = self.make_products(1, stock=1)[0]
+        CartItem.objects.create(user=self.buyer, product=product, quantity=3)
+        response = self.checkout_cart()
+        self.assertEqual(response.status_code, 409)
+        failure = response.json()['cart_items'][0]
+        self.assertEqual((failure['product_id'], failure['requested'], failure['available']), (product.id, 3, 1))
+        self.assertTrue(CartItem.objects.filter(user=self.buyer).exists())
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_cart_is_rejected(self):
+        self.assertEqual(self.checkout_cart().status_code, 400)
+
+
+class ReorderTestCase(OrdersAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.products = self.make_products(4, stock=10)
+        self.assertEqual(self.checkout(self.products, quantity=3).status_code, 201)
+        self.order = Order.objects.get()
+        ok, repriced, short, gone = self.products
+        Product.objects.filter(pk=repriced.pk).update(price=Decimal('55.00'))
+        Product.objects.filter(pk=short.pk).update(stock_quantity=2, price=Decimal('45.00'))
+        Product.objects.filter(pk=gone.pk).update(stock_quantity=0, is_available=False)
+
+    def reorder(self, **data):
+        return self.client.post(f'/api/orders/{self.order.pk}/reorder/', data, format='json')
+
+    def test_reorder_into_cart_reports_each_line(self):
+        response = self.reorder()
+        self.assertEqual(response.status_code, 200)
+        statuses = [line['status'] for line in response.data['lines']]
+        self.assertEqual(statuses, ['ok', 'price_changed', 'partial', 'unavailable'])
+        # The short line was repriced as well
+        flags = [line['price_changed'] for line in response.data['lines']]
+        self.assertEqual(flags, [False, True, True, False])
+        self.assertEqual(
+            (response.data['lines'][2]['price_at_purchase'], response.data['lines'][2]['current_price']),
+            (Decimal('50.00'), Decimal('45.00')),
+        )
+        quantities = dict(CartItem.objects.filter(user=self.buyer).values_list('product_id', 'quantity'))
+        self.assertEqual(quantities, {self.products[0].id: 3, self.products[1].id: 3, self.products[2].id: 2})
+        self.assertEqual(Decimal(response.data['cart']['total']), Decimal('405.00'))
+
+    def test_reorder_checkout_uses_current_prices(self):
+        response = self.reorder(target='checkout')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data['order']['total_amount']), Decimal('405.00'))
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(Order.objects.latest('id').delivery_address, self.order.delivery_address)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_reorder_query_count_is_independent_of_order_size(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.reorder()
+        small = len(ctx.captured_queries)
+        self.assertEqual(self.checkout(self.make_products(30), quantity=1).status_code, 201)
+        big = Order.objects.latest('id')
+        CartItem.objects.all().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f'/api/orders/{big.pk}/reorder/', {}, format='json')
+        self.assertEqual(len(ctx.captured_queries), small)
+
+    def test_cannot_reorder_someone_elses_order(self):
+        self.client.force_authenticate(self.farmer)
+        self.assertEqual(self.reorder().status_code, 404)
+
+
+class OrderStatusTestCase(OrdersAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(
+            username='dispatch', email='dispatch@example.com', password='pass12345', is_staff=True
+        )
+        self.products = self.make_products(2, stock=10)
+
+    def place_orders(self, count, quantity=2):
+        for _ in range(count):
+            self.assertEqual(self.checkout(self.products, quantity=quantity).status_code, 201)
+        return list(Order.objects.order_by('id').values_list('id', flat=True))
+
+    def transition(self, order_ids, status):
+        self.client.force_authenticate(self.staff)
+        return self.client.post(
+            '/api/orders/transition/', {'order_ids': order_ids, 'status': status}, format='json'
+        )
+
+    def test_bulk_transition_only_moves_allowed_orders(self):
+        first, second, third = self.place_orders(3, quantity=1)
+        Order.objects.filter(pk__in=[first, second]).update(status='processing')
+        response = self.transition([first, second, third, 999999], 'shipped')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [first, second])
+        self.assertEqual(
+            {r['order_id']: r['status'] for r in response.data['rejected']}, {third: 'pending', 999999: None}
+        )
+        self.assertEqual(Order.objects.get(pk=third).status, 'pending')
+        history = OrderStatusHistory.objects.get(order_id=first)
+        self.assertEqual(
+            (history.from_status, history.to_status, history.changed_by), ('processing', 'shipped', self.staff)
+        )
+
+    def test_transition_query_count_is_independent_of_batch_size(self):
+        ids = self.place_orders(8, quantity=1)
+        counts = []
+        for batch in (ids[:2], ids[2:]):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(len(self.transition(batch, 'cancelled').data['updated']), len(batch))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_cancellation_returns_stock(self):
+        ids = self.place_orders(3, quantity=3)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_quantity, 1)
+        self.transition(ids[:2], 'cancelled')
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[p.pk for p in self.products]).values_list('stock_quantity', flat=True)),
+            [7, 7],
+        )
+        # Cancelling twice is rejected and does not restock again
+        response = self.transition(ids[:2], 'cancelled')
+        self.assertEqual(response.data['updated'], [])
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_quantity, 7)
+
+    def test_transition_requires_staff_and_valid_target(self):
+        ids = self.place_orders(1)
+        response = self.client.post('/api/orders/transition/', {'order_ids': ids, 'status': 'shipped'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.transition(ids, 'pending').status_code, 400)
+
+    def test_buyer_can_cancel_own_pending_order_and_read_history(self):
+        order_id = self.place_orders(1)[0]
+        response = self.client.post(f'/api/orders/{order_id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'cancelled')
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_quantity, 10)
+        history = self.client.get(f'/api/orders/{order_id}/history/').data
+        self.assertEqual(
+            [(h['from_status'], h['to_status'], h['changed_by']) for h in history], [('pending', 'cancelled', 'buyer')]
+        )
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 400)
+
+        Order.objects.filter(pk=order_id).update(status='shipped')
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 400)
+        self.client.force_authenticate(self.farmer)
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 404)
+
+
+class FarmerSalesTestCase(OrdersAPITestCase):
+    def rollups(self):
+        return {
+            row.product_id: (row.units, row.revenue)
+            for row in FarmerDailySales.objects.filter(farmer=self.farmer, day=date.today())
+        }
+
+    def test_checkout_and_cancellation_maintain_rollups(self):
+        products = self.make_products(2, stock=20)
+        self.checkout(products, quantity=2)
+        self.checkout(products[:1], quantity=3)
+        self.assertEqual(self.rollups(), {
+            products[0].id: (5, Decimal('250.00')),
+            products[1].id: (2, Decimal('100.00')),
+        })
+
+        order_id = Order.objects.order_by('id').first().id
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 200)
+        self.assertEqual(self.rollups(), {
+            products[0].id: (3, Decimal('150.00')),
+            products[1].id: (0, Decimal('0.00')),
+        })
+
+        FarmerDailySales.objects.all().delete()
+        self.assertEqual(rebuild_sales_rollups(), 1)
+        self.assertEqual(self.rollups(), {products[0].id: (3, Decimal('150.00'))})
+
+    def test_dashboard_reads_rollups_in_constant_queries(self):
+        products = self.make_products(5, stock=20)
+        for i, product in enumerate(products):
+            self.checkout([product], quantity=i + 1)
+
+        self.client.force_authenticate(self.farmer)
+        # totals + series + top products
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/farmer/sales/?top=2&granularity=month')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals'], {'units': 15, 'revenue': Decimal('750.00')})
+        self.assertEqual(len(response.data['series']), 1)
+        self.assertEqual(response.data['series'][0]['units'], 15)
+        self.assertEqual([row['product_id'] for row in response.data['top_products']], [products[4].id, products[3].id])
+
+        self.assertEqual(self.client.get('/api/farmer/sales/?start=2030-01-02&end=2030-01-01').status_code, 400)
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get('/api/farmer/sales/').status_code, 403)
+
+
+class OrderListTestCase(OrdersAPITestCase):
+    def test_order_list_query_count_is_constant(self):
+        products = self.make_products(3, stock=100)
+        for _ in range(20):
+            self.checkout(products, quantity=2)
+
+        # COUNT for pagination + orders (with total_items) + prefetched items/products
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['total_items'], 6)
+        self.assertEqual(len(response.data['results'][0]['order_items']), 3)
+
+        order_id = response.data['results'][0]['id']
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/orders/{order_id}/')
+        self.assertEqual(response.data['total_items'], 6)
+
+
+class OrderExportTestCase(OrdersAPITestCase):
+    def test_ndjson_export_groups_items_per_order(self):
+        products = self.make_products(2, stock=10)
+        self.checkout(products, quantity=1)
+        self.checkout(products[:1], quantity=3)
+        Order.objects.filter(id=Order.objects.order_by('id').first().id).update(status='delivered')
+
+        response = self.client.get('/api/orders/export/?file_format=ndjson')
+        orders = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([len(o['items']) for o in orders], [1, 2])
+        self.assertEqual(orders[0]['items'][0]['quantity'], 3)
+
+        response = self.client.get('/api/orders/export/?status=delivered')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)  # header + two items
+        self.assertTrue(lines[0].startswith('order_id,'))
+
+    def test_export_rejects_bad_filters(self):
+        response = self.client.get('/api/orders/export/?created_after=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+
+class PerformanceBudgetTestCase(OrdersAPITestCase):
+    def setUp(self):
+        super().setUp()
+        from freshharvest.instrumentation import stats
+
+        stats.reset()
+
+    @override_settings(PERFORMANCE_BUDGETS_STRICT=True, PERFORMANCE_BUDGETS={'order-list': {'queries': 3}})
+    def test_order_list_stays_within_query_budget(self):
+        products = self.make_products(3, stock=100)
+        for _ in range(5):
+            self.checkout(products)
+        response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PERFORMANCE_BUDGETS_STRICT=True)
+    def test_farmer_sales_fits_its_budget_with_jwt_auth(self):
+        from freshharvest.instrumentation import stats
+
+        cache.clear()
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'farmer@example.com', 'password': 'pass12345'}, format='json'
+        )
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        stats.reset()
+        # Auth-state cache miss, then hit
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/farmer/sales/').status_code, 200)
+        summary = stats.summary()['GET farmer-sales']
+        self.assertEqual(summary['queries_max'], settings.PERFORMANCE_BUDGETS['farmer-sales']['queries'])
+
+    @override_settings(PERFORMANCE_BUDGETS_STRICT=True, PERFORMANCE_BUDGETS={'order-list': {'queries': 0}})
+    def test_strict_budget_overrun_fails(self):
+        from freshharvest.instrumentation import PerformanceBudgetExceeded
+
+        with self.assertRaises(PerformanceBudgetExceeded):
+            self.client.get('/api/orders/')
+
+    def test_serializer_time_is_split_from_view_time(self):
+        from freshharvest.instrumentation import stats
+        from .serializers import OrderSerializer
+
+        self.checkout(self.make_products(1))
+        stats.reset()
+        slow = OrderSerializer.to_representation
+
+        def to_representation(serializer, instance):
+            time.sleep(0.3)
+            return slow(serializer, instance)
+
+        with mock.patch.object(OrderSerializer, 'to_representation', to_representation):
+            self.assertEqual(self.client.get('/api/orders/').status_code, 200)
+        summary = stats.summary()['GET order-list']
+        self.assertGreaterEqual(summary['serialize_ms_max'], 300)
+        self.assertLess(summary['view_ms_max'], 300)
+
+    def test_summary_is_admin_only_and_aggregates_per_endpoint(self):
+        self.client.get('/api/orders/')
+        self.client.get('/api/orders/')
+        self.assertEqual(self.client.get('/api/perf/summary/').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass12345'
+        ))
+        summary = self.client.get('/api/perf/summary/').data['endpoints']
+        self.assertEqual(summary['GET order-list']['count'], 2)
+        self.assertEqual(summary['GET order-list']['queries_max'], 1)  # COUNT only, no orders yet
+
+
+class AdminChangelistTestCase(OrdersAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass12345'
+        ))
+        self.products = self.make_products(2, stock=100)
+
+    def add_orders(self, count):
+        for i in range(count):
+            name = f'shopper{Order.objects.count()}'
+            user = User.objects.create_user(username=name, email=f'{name}@example.com', password=None)
+            order = Order.objects.create(user=user, total_amount=Decimal('50.00'), delivery_address='Kilimani')
+            OrderItem.objects.create(order=order, product=self.products[i % 2], quantity=1, price_at_purchase=Decimal('50.00'))
+            CartItem.objects.create(user=user, product=self.products[i % 2], quantity=1)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = ['/admin/orders/order/', '/admin/orders/orderitem/', '/admin/orders/cartitem/', '/admin/products/product/']
+        self.add_orders(2)
+        before = [self.queries(url) for url in urls]
+        self.add_orders(6)
+        self.assertEqual([self.queries(url) for url in urls], before)
+
+    def test_small_results_are_counted_without_explain(self):
+        self.add_orders(3)
+        with mock.patch('freshharvest.admin_utils.estimated_count') as estimate:
+            response = self.client.get('/admin/orders/order/')
+        estimate.assert_not_called()
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertContains(response, 'created_at__day=')  # date hierarchy drill-down
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=2)
+    def test_large_results_use_the_planner_estimate(self):
+        self.add_orders(3)
+        with mock.patch('freshharvest.admin_utils.estimated_count', return_value=1000) as estimate:
+            response = self.client.get('/admin/orders/order/')
+        estimate.assert_called_once()
+        self.assertEqual(response.context['cl'].result_count, 1000)
+
+    def test_user_filter_only_renders_the_selected_user(self):
+        self.add_orders(3)
+        response = self.client.get('/admin/orders/order/')
+        self.assertNotContains(response, 'user__id__exact=')
+        self.assertContains(response, 'autocomplete-filter-user')
+        self.assertContains(response, 'admin/js/autocomplete.js')
+
+        shopper = User.objects.get(username='shopper1')
+        response = self.client.get(f'/admin/orders/order/?user__id__exact={shopper.id}')
+        self.assertContains(response, f'<option value="{shopper.id}" selected>{shopper}</option>', html=True)
+        self.assertEqual(list(response.context['cl'].result_list), list(shopper.orders.all()))
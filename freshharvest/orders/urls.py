@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CheckoutViewSet, OrderViewSet, CartItemViewSet
+from .views import CheckoutViewSet, FarmerSalesViewSet, OrderViewSet, CartItemViewSet
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='order')
@@ -10,4 +10,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('cart/items/', include(router.urls)),
     path('checkout/', CheckoutViewSet.as_view({'post': 'checkout'}), name='checkout'),
+    path('farmer/sales/', FarmerSalesViewSet.as_view({'get': 'dashboard'}), name='farmer-sales'),
 ]
@@ -1,10 +1,31 @@
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from .models import Order, OrderItem, CartItem
-from .serializers import CheckoutSerializer, OrderSerializer, CartItemSerializer
+from .serializers import (
+    BulkCartSerializer, CartCheckoutSerializer, CheckoutSerializer, OrderSerializer, CartItemSerializer,
+    CartSummarySerializer, OrderExportFilterSerializer, OrderStatusHistorySerializer, OrderTransitionSerializer,
+    ReorderSerializer, SalesDashboardFilterSerializer,
+)
+from .cart import MODE_INCREMENT, apply_cart_operations, cart_summary
+from .checkout import StockReservationError, place_order
+from .export import export_orders
+from .reorder import plan_reorder
+from .sales import sales_dashboard
+from .status import BUYER_CANCELLABLE, CANCELLED, transition_orders
 from products.models import Product
+from freshharvest.instrumentation import SerializerTimingMixin, serializer_data
+from freshharvest.pagination import SwitchablePagination
+
+def stock_conflict(exc, **extra):
+    """409 listing the basket lines that could not be reserved, with their ints intact."""
+    return Response(
+        {'detail': 'Some items could not be reserved.', 'cart_items': exc.failures, **extra},
+        status=status.HTTP_409_CONFLICT,
+    )
 
 class CheckoutViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -13,18 +34,167 @@ class CheckoutViewSet(viewsets.ViewSet):
     def checkout(self, request):
         serializer = CheckoutSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            order = serializer.save()
-            return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+            try:
+                order = serializer.save()
+            except StockReservationError as exc:
+                return stock_conflict(exc)
+            order = Order.objects.with_items().get(pk=order.pk)
+            return Response(serializer_data(OrderSerializer(order)), status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+class FarmerSalesViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    def dashboard(self, request):
+        """
+        **Farmer Sales Dashboard**
+        
+        Units and revenue for the farmer's products between `start` and `end`
+        (YYYY-MM-DD, inclusive; default the last 30 days): `totals`, a
+        `series` bucketed by `?granularity=day|week|month` and the `top`
+        (default 10) products by revenue. Read from the daily sales rollups
+        only, so the cost does not grow with the order history.
+        """
+        if request.user.user_type != 'farmer':
+            return Response({'detail': 'Only farmers have a sales dashboard.'}, status=status.HTTP_403_FORBIDDEN)
+        filters = SalesDashboardFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(sales_dashboard(request.user, **filters.validated_data))
+
+class OrderViewSet(SerializerTimingMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SwitchablePagination  # ?pagination=cursor for keyset pages
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).select_related('user')
+        # Meta.ordering is ignored once total_items adds a GROUP BY
+        return Order.objects.filter(user=self.request.user).with_items().order_by('-created_at')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def transition(self, request):
+        """
+        **Bulk Status Transition (staff)**
+        
+        Move many orders to `status` at once; only orders whose current
+        status allows it are changed (one UPDATE per batch), each change is
+        logged to the status history, and cancellations return stock.
+        
+        Request:
+        ```json
+        {"order_ids": [101, 102, 103], "status": "shipped", "note": "Morning run"}
+        ```
+        """
+        serializer = OrderTransitionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+        result = transition_orders(
+            params['order_ids'], params['status'], changed_by=request.user, note=params.get('note', '')
+        )
+        return Response(result)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        **Cancel Order**
+        
+        Buyers can cancel their own pending or confirmed orders; the items
+        go back into stock.
+        """
+        order = get_object_or_404(Order.objects.filter(user=request.user).only('id'), pk=pk)
+        result = transition_orders(
+            [order.pk], CANCELLED, changed_by=request.user, allowed_from=BUYER_CANCELLABLE
+        )
+        if result['rejected']:
+            return Response({'detail': result['rejected'][0]['error']}, status=status.HTTP_400_BAD_REQUEST)
+        order = Order.objects.with_items().get(pk=order.pk)
+        return Response(serializer_data(OrderSerializer(order)))
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """**Status History** - every transition of the order, oldest first"""
+        order = get_object_or_404(Order.objects.filter(user=request.user).only('id'), pk=pk)
+        entries = order.status_history.select_related('changed_by')
+        return Response(serializer_data(OrderStatusHistorySerializer(entries, many=True)))
+
+    @action(detail=True, methods=['post'])
+    def reorder(self, request, pk=None):
+        """
+        **Reorder**
+        
+        Load a past order into the cart (`"target": "cart"`, default) or check
+        it out straight away (`"target": "checkout"`, optional
+        `delivery_address`/`order_notes`, defaulting to the original address).
+        Lines are matched against current price and stock in one query and
+        clamped to what is available; `lines` reports each one as `ok`,
+        `price_changed`, `partial` or `unavailable`.
+        """
+        params = ReorderSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = params.validated_data
+        order = get_object_or_404(
+            Order.objects.filter(user=request.user).only('id', 'delivery_address'), pk=pk
+        )
+        
+        quantities, lines = plan_reorder(order)
+        if not quantities:
+            return Response(
+                {'detail': 'None of the items in this order are available.', 'lines': lines},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        
+        if params['target'] == 'cart':
+            apply_cart_operations(request.user, [
+                {'product': pid, 'quantity': qty, 'mode': MODE_INCREMENT} for pid, qty in quantities.items()
+            ])
+            cart = serializer_data(CartSummarySerializer(cart_summary(request.user), context=self.get_serializer_context()))
+            return Response({'lines': lines, 'cart': cart})
+        
+        try:
+            new_order = place_order(
+                request.user,
+                quantities,
+                delivery_address=params.get('delivery_address', order.delivery_address),
+                order_notes=params.get('order_notes', ''),
+            )
+        except StockReservationError as exc:
+            return stock_conflict(exc, lines=lines)
+        new_order = Order.objects.with_items().get(pk=new_order.pk)
+        return Response({'lines': lines, 'order': serializer_data(OrderSerializer(new_order))}, status=status.HTTP_201_CREATED)
 
-class CartItemViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        **Stream Order History**
+        
+        `?file_format=csv` (one row per item, default) or `ndjson` (one order
+        per line with nested items). Optional `status`, `created_after`,
+        `created_before` (YYYY-MM-DD, inclusive).
+        """
+        filters = OrderExportFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = filters.validated_data
+        
+        orders = Order.objects.filter(user=request.user)
+        if 'status' in params:
+            orders = orders.filter(status=params['status'])
+        if 'created_after' in params:
+            orders = orders.filter(created_at__date__gte=params['created_after'])
+        if 'created_before' in params:
+            orders = orders.filter(created_at__date__lte=params['created_before'])
+        
+        file_format = params['file_format']
+        response = StreamingHttpResponse(
+            export_orders(orders, file_format),
+            content_type='text/csv' if file_format == 'csv' else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="orders.{file_format}"'
+        return response
+
+class CartItemViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     **Cart Management API**
     
@@ -38,25 +208,82 @@ class CartItemViewSet(viewsets.ModelViewSet):
     #permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-       return CartItem.objects.filter(user=self.request.user)
+        # Product, exact line subtotal and stock flag in the same query
+        return CartItem.objects.filter(user=self.request.user).with_totals()
     
     def perform_create(self, serializer):
+        # The serializer returns the upserted line with totals already
         serializer.save(user=self.request.user)
+    
+    def perform_update(self, serializer):
+        cart_item = serializer.save()
+        serializer.instance = self.get_queryset().get(pk=cart_item.pk)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        **Cart Summary**
+        
+        Line subtotals, stock flags, item count and grand total, computed in
+        the database with Decimal arithmetic in one query. `?lines=false`
+        returns the totals only.
+        """
+        if request.query_params.get('lines', '').lower() in ('false', '0', 'no'):
+            return Response(serializer_data(CartSummarySerializer(CartItem.objects.filter(user=request.user).summary())))
+        return Response(self.cart_state())
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        **Bulk Cart Update**
+        
+        Apply many add/set/remove operations at once and return the new cart
+        (same shape as `summary`).
+        
+        Request:
+        ```json
+        {
+          "operations": [
+            {"product": 1, "quantity": 2, "mode": "increment"},
+            {"product": 2, "quantity": 5, "mode": "set"},
+            {"product": 3, "mode": "remove"}
+          ]
+        }
+        ```
+        """
+        serializer = BulkCartSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        apply_cart_operations(request.user, serializer.validated_data['operations'])
+        return Response(self.cart_state())
+
+    def cart_state(self):
+        return serializer_data(
+            CartSummarySerializer(cart_summary(self.request.user), context=self.get_serializer_context())
+        )
 
     @action(detail=False, methods=['post'])
     def checkout(self, request):
         """
         **Place Order + Clear Cart**
         
-        Converts cart → Order + OrderItems, then clears cart
+        Converts the saved cart → Order + OrderItems and clears it, in one
+        transaction. Stock is reserved like `/api/checkout/`.
         
         Request:
         ```json
         {
           "delivery_address": "Kilimani, Nairobi",
-          "order_notes": "Call before delivery",
-          "cart_items": [{"product_id": 1, "quantity": 2}]
+          "order_notes": "Call before delivery"
         }
         ```
         """
-
+        serializer = CartCheckoutSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            try:
+                order = serializer.save()
+            except StockReservationError as exc:
+                return stock_conflict(exc)
+            order = Order.objects.with_items().get(pk=order.pk)
+            return Response(serializer_data(OrderSerializer(order)), status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,4 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from freshharvest.admin_utils import AutocompleteFilter, LargeTableAdminMixin
 from .models import Category, Product
 
 
@@ -16,16 +20,34 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description', 'slug']
     ordering = ['name']
     list_filter = ['created_at']
-    inlines = [ProductInline]
+    readonly_fields = ['products']
+
+    def get_inlines(self, request, obj):
+        # Inline forms only for small categories; big ones link to the
+        # filtered (paginated) product changelist instead
+        limit = getattr(settings, 'ADMIN_CATEGORY_INLINE_LIMIT', 50)
+        if obj is None or obj.products.all()[:limit + 1].count() > limit:
+            return []
+        return [ProductInline]
+
+    @admin.display(description='Products')
+    def products(self, obj):
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:products_product_changelist')
+        return format_html('<a href="{}?category__id__exact={}">View products</a>', url, obj.pk)
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = [
         'name', 'farmer', 'category', 'price',
         'stock_quantity', 'is_available', 'harvest_date'
     ]
-    list_filter = ['category', 'farmer', 'is_available', 'harvest_date']
+    list_filter = ['category', ('farmer', AutocompleteFilter), 'is_available', 'harvest_date']
+    list_select_related = ['farmer', 'category']
     search_fields = ['name', 'description']
+    autocomplete_fields = ['farmer', 'category']
     list_editable = ['price', 'stock_quantity']
+    # Min/max and the DISTINCT date_trunc() drill-down read idx_harvest_date_id
     date_hierarchy = 'harvest_date'
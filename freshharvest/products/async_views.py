@@ -0,0 +1,128 @@
+"""
+Async-native read endpoints for catalog browsing.
+
+Under ASGI the DRF viewsets are sync, so every request borrows a thread
+from the sync-to-async pool. These views query with the async ORM
+(`acount`, async iteration, `aget`) and only hand fully loaded rows to the
+serializers (category, farmer and stats are joined up front), so
+serialization is pure CPU work and never touches the database from the
+event loop.
+
+Response shapes match the sync endpoints (page-number pagination).
+"""
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from freshharvest.instrumentation import serializer_data
+
+from .models import Category, Product
+from .serializers import CategorySerializer, ProductSerializer
+from .stream import event_stream
+
+PRODUCT_FILTERS = ('category', 'farmer', 'is_available')
+PRODUCT_ORDERING = ('price', 'harvest_date', 'created_at', 'rank_score')
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _page_url(request, page):
+    if page is None:
+        return None
+    params = request.GET.copy()
+    params['page'] = page
+    return request.build_absolute_uri(f'{request.path}?{urlencode(params, doseq=True)}')
+
+
+async def _paginate(request, queryset, serializer_class):
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return _json({'detail': 'Invalid page.'}, status=404)
+    page_size = api_settings.PAGE_SIZE
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        return _json({'detail': 'Invalid page.'}, status=404)
+
+    rows = [obj async for obj in queryset[offset:offset + page_size]]
+    return _json({
+        'count': count,
+        'next': _page_url(request, page + 1 if offset + page_size < count else None),
+        'previous': _page_url(request, page - 1 if page > 1 else None),
+        'results': serializer_data(serializer_class(rows, many=True, context={'request': request})),
+    })
+
+
+@require_GET
+async def product_list(request):
+    """
+    **Products (async)**
+
+    Same filters (`category`, `farmer`, `is_available`) and `?ordering=`
+    fields as `/api/products/`, without `?search=`.
+    """
+    queryset = Product.objects.select_related('category', 'farmer').defer('search_vector')
+    filters = {}
+    for field in PRODUCT_FILTERS:
+        value = request.GET.get(field)
+        if value:
+            filters[field] = value.lower() == 'true' if field == 'is_available' else value
+    try:
+        queryset = queryset.filter(**filters)
+    except ValueError:
+        return _json({'detail': 'Invalid filter value.'}, status=400)
+
+    ordering = request.GET.get('ordering', '')
+    if ordering.lstrip('-') in PRODUCT_ORDERING:
+        queryset = queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+    else:
+        queryset = queryset.order_by('-created_at', '-id')
+    return await _paginate(request, queryset, ProductSerializer)
+
+
+@require_GET
+async def product_detail(request, pk):
+    queryset = Product.objects.select_related('category', 'farmer').defer('search_vector')
+    try:
+        product = await queryset.aget(pk=pk)
+    except Product.DoesNotExist:
+        return _json({'detail': 'No Product matches the given query.'}, status=404)
+    return _json(serializer_data(ProductSerializer(product, context={'request': request})))
+
+
+@require_GET
+async def category_list(request):
+    queryset = Category.objects.select_related('stats').order_by('name')
+    return await _paginate(request, queryset, CategorySerializer)
+
+
+@require_GET
+async def stock_stream(request):
+    """
+    **Live Stock (SSE)**
+
+    `text/event-stream` of `stock` events (`{id, stock_quantity,
+    is_available}`) as products are saved or bought; `?products=1,2,3`
+    limits the stream to those ids. A `resync` event means deltas were
+    dropped and the client should refetch. Serve under ASGI: idle
+    connections then cost no thread.
+    """
+    product_ids = None
+    if request.GET.get('products'):
+        try:
+            product_ids = {int(pk) for pk in request.GET['products'].split(',')}
+        except ValueError:
+            return _json({'products': ['Comma-separated product ids expected.']}, status=400)
+
+    heartbeat = getattr(settings, 'STOCK_STREAM_HEARTBEAT', 15)
+    response = StreamingHttpResponse(event_stream(product_ids, heartbeat), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
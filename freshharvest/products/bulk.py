@@ -0,0 +1,237 @@
+"""
+Streaming bulk import/export of a farmer's products (CSV or JSONL), and
+bulk price/stock patches.
+
+Import reads rows lazily, validates them in chunks with
+`ProductImportRowSerializer` (categories resolved by slug once per chunk)
+and upserts each chunk with a single `bulk_create(update_conflicts=True)`
+on the (farmer, sku) constraint, in its own transaction after a locking
+read of the rows it overwrites (the category stats deltas). Export walks a server-side cursor, so
+memory stays flat whatever the catalog size.
+
+`patch_products` applies `{id, price?, stock_quantity?}` updates with one
+`UPDATE ... FROM (VALUES ...)` statement (after one locking read of the
+old values, which the category stats deltas need): `is_available` is
+recomputed from the new stock and farmer ownership is part of the join
+condition, so foreign or unknown ids are simply not updated.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import invalidate_products
+from .models import Category, Product
+from .serializers import ProductImportRowSerializer
+from .stats import STATE_FIELDS, ProductState, record_changes, state_of
+from .stream import publish_stock_changes
+
+FORMATS = ('csv', 'jsonl')
+EXPORT_FIELDS = [
+    'sku', 'name', 'description', 'price', 'stock_quantity',
+    'category', 'harvest_date', 'image', 'weight_per_unit',
+]
+UPSERT_FIELDS = [
+    'name', 'description', 'price', 'stock_quantity', 'category',
+    'harvest_date', 'image', 'weight_per_unit', 'is_available', 'updated_at',
+]
+
+
+def detect_format(filename, content_type='', default='csv'):
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return default
+
+
+def iter_rows(fileobj, file_format):
+    """Yield dict rows from a binary file object without loading it whole."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        for row in csv.DictReader(text):
+            # Empty CSV cells mean "not given" (e.g. optional image)
+            yield {key: value for key, value in row.items() if key and value != ''}
+        return
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {'__invalid__': line[:100]}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_products(rows, farmer, chunk_size=None):
+    """
+    Validate + upsert `rows` for `farmer`. Returns a report:
+    `{'imported': n, 'failed': m, 'errors': [{'row': i, 'errors': {...}}]}`
+    where `row` is the 1-based data row number.
+    """
+    chunk_size = chunk_size or getattr(settings, 'PRODUCT_IMPORT_CHUNK_SIZE', 1000)
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    row_number = 0
+
+    for chunk in _chunks(rows, chunk_size):
+        slugs = {row.get('category') for row in chunk if isinstance(row.get('category'), str)}
+        categories = dict(Category.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        validator = ProductImportRowSerializer(context={'categories': categories})
+
+        products, seen_skus = [], set()
+        for row in chunk:
+            row_number += 1
+            try:
+                if '__invalid__' in row:
+                    raise serializers.ValidationError({'non_field_errors': ['Row is not a JSON object.']})
+                data = validator.run_validation(row)
+                if data['sku'] in seen_skus:
+                    raise serializers.ValidationError({'sku': ['Duplicate SKU in the same chunk.']})
+            except serializers.ValidationError as exc:
+                report['failed'] += 1
+                report['errors'].append({'row': row_number, 'errors': exc.detail})
+                continue
+            seen_skus.add(data['sku'])
+            category_id = data.pop('category')
+            products.append(Product(
+                farmer=farmer,
+                category_id=category_id,
+                is_available=data['stock_quantity'] > 0,
+                **data,
+            ))
+
+        if products:
+            with transaction.atomic():
+                _upsert_chunk(farmer, products)
+            report['imported'] += len(products)
+
+    return report
+
+
+def _upsert_chunk(farmer, products):
+    # Rows the upsert will overwrite, for the category stats deltas: locked
+    # (in id order, like `_patch_products`) so no concurrent write lands
+    # between this read and the upsert
+    existing = {
+        sku: ProductState(*state)
+        for sku, *state in Product.objects.select_for_update().filter(
+            farmer=farmer, sku__in=[p.sku for p in products]
+        ).order_by('id').values_list('sku', *STATE_FIELDS)
+    }
+    Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=['farmer', 'sku'],
+        update_fields=UPSERT_FIELDS,
+    )
+    invalidate_products(
+        [p.pk for p in products if p.pk],
+        categories={p.category_id for p in products} | {state.category_id for state in existing.values()},
+        farmers=[farmer.pk],
+    )
+    publish_stock_changes([p.pk for p in products if p.pk])
+    record_changes([(existing.get(p.sku), state_of(p)) for p in products])
+
+
+def patch_products(farmer, updates):
+    """
+    Apply `updates` (dicts with `id` and `price` and/or `stock_quantity`) to
+    `farmer`'s products in one UPDATE, after one locking read of their
+    current state for the category stats. Returns
+    `{'updated': [{'id', 'is_available'}], 'not_found': [ids]}`.
+    """
+    if not updates:
+        return {'updated': [], 'not_found': []}
+    with transaction.atomic():
+        return _patch_products(farmer, updates)
+
+
+def _patch_products(farmer, updates):
+    # Locked in id order, like the UPDATE below, so batches cannot deadlock
+    old = {
+        pk: ProductState(*state)
+        for pk, *state in Product.objects.select_for_update().filter(
+            farmer=farmer, id__in=[u['id'] for u in updates]
+        ).order_by('id').values_list('id', *STATE_FIELDS)
+    }
+    ops = connection.ops
+    table = ops.quote_name(Product._meta.db_table)
+    price = Product._meta.get_field('price')
+
+    params = []
+    for update in sorted(updates, key=lambda u: u['id']):
+        new_price = update.get('price')
+        if new_price is not None:
+            new_price = ops.adapt_decimalfield_value(new_price, price.max_digits, price.decimal_places)
+        params += [update['id'], new_price, update.get('stock_quantity')]
+    values = ', '.join(['(CAST(%s AS bigint), CAST(%s AS numeric), CAST(%s AS integer))'] * len(updates))
+    params += [ops.adapt_datetimefield_value(timezone.now()), farmer.pk]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH v (id, price, stock_quantity) AS (VALUES {values}) '
+            f'UPDATE {table} SET '
+            f'price = COALESCE(v.price, {table}.price), '
+            f'stock_quantity = COALESCE(v.stock_quantity, {table}.stock_quantity), '
+            f'is_available = COALESCE(v.stock_quantity, {table}.stock_quantity) > 0, '
+            f'updated_at = %s '
+            f'FROM v WHERE {table}.id = v.id AND {table}.farmer_id = %s '
+            f'RETURNING {table}.id, {table}.is_available',
+            params,
+        )
+        updated = sorted((pk, bool(is_available)) for pk, is_available in cursor.fetchall())
+
+    updated_ids = [pk for pk, _ in updated]
+    if updated_ids:
+        invalidate_products(
+            updated_ids, categories={state.category_id for state in old.values()}, farmers=[farmer.pk]
+        )
+        publish_stock_changes(updated_ids)
+        prices = {u['id']: u['price'] for u in updates if u.get('price') is not None}
+        record_changes([
+            (old[pk], old[pk]._replace(price=prices.get(pk, old[pk].price), is_available=is_available))
+            for pk, is_available in updated if pk in old
+        ])
+    return {
+        'updated': [{'id': pk, 'is_available': is_available} for pk, is_available in updated],
+        'not_found': sorted({u['id'] for u in updates} - set(updated_ids)),
+    }
+
+
+def export_rows(queryset, file_format, chunk_size=2000):
+    """Yield the encoded export (header first for CSV), one row at a time."""
+    rows = queryset.order_by('id').values_list(
+        'sku', 'name', 'description', 'price', 'stock_quantity',
+        'category__slug', 'harvest_date', 'image', 'weight_per_unit',
+    ).iterator(chunk_size=chunk_size)
+
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def encode(values):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(values)
+            return buffer.getvalue()
+
+        yield encode(EXPORT_FIELDS)
+        for values in rows:
+            yield encode(['' if v is None else v for v in values])
+        return
+
+    for values in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, values)), default=str) + '\n'
@@ -0,0 +1,145 @@
+"""
+Read-through response cache for the public product catalog.
+
+List responses are keyed on the normalized query string (filters, search,
+ordering, page) under two version numbers: the catalog-wide one, and the
+one of the narrowest scope the page's rows come from (`?category=<id>`,
+else `?farmer=<id>`, else `all`). Detail responses are keyed on the
+product id.
+
+Saving/deleting a Product or Category (see `products.signals`), checkout
+stock deductions, restocks and bulk writes call `invalidate_products`
+with the categories and farmers involved, so a stock change only drops the
+`all` pages and those of its own category and farmer; other categories'
+and farmers' pages stay cached. `invalidate_lists` (ranking refresh) bumps
+the catalog-wide version. Invalidation runs after the surrounding
+transaction commits.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+LIST_VERSION_KEY = 'catalog:list:version'
+STATS_KEYS = {'hits': 'catalog:stats:hits', 'misses': 'catalog:stats:misses'}
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stats():
+    hits = cache.get(STATS_KEYS['hits'], 0)
+    misses = cache.get(STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total, 4) if total else None}
+
+
+def normalized_query(params):
+    """Sorted, blank-free query string so equivalent URLs share a key."""
+    pairs = sorted(
+        (key, value)
+        for key in params
+        for value in params.getlist(key)
+        if value != ''
+    )
+    return '&'.join(f'{key}={value}' for key, value in pairs)
+
+
+def scope_version_key(scope):
+    return f'{LIST_VERSION_KEY}:{scope}'
+
+
+def list_scope(params):
+    """Narrowest scope holding every row of a list request: one category, one farmer or `all`."""
+    for field in ('category', 'farmer'):
+        values = params.getlist(field)
+        if len(values) == 1 and values[0].isdigit():
+            return f'{field}:{int(values[0])}'
+    return 'all'
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, timeout=None)
+            versions[key] = cache.get(key, 1)
+    return [versions[key] for key in keys]
+
+
+def list_key(request):
+    version, scope_version = _versions([LIST_VERSION_KEY, scope_version_key(list_scope(request.query_params))])
+    raw = f'{request.get_host()}{request.path}?{normalized_query(request.query_params)}'
+    return f'catalog:list:{version}.{scope_version}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def detail_key(pk):
+    return f'catalog:product:{pk}'
+
+
+def _bump(key):
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate_lists():
+    """Drop every cached list page (e.g. after a ranking refresh)."""
+    transaction.on_commit(lambda: _bump(LIST_VERSION_KEY))
+
+
+def invalidate_products(product_ids, categories=(), farmers=()):
+    """
+    Drop detail entries for `product_ids` and the list pages that can show
+    them: the `all` pages and those of `categories` and `farmers` (every
+    category the products are in or just left, and their farmers).
+    """
+    keys = [detail_key(pk) for pk in product_ids]
+    scopes = ['all', *{f'category:{pk}' for pk in categories}, *{f'farmer:{pk}' for pk in farmers}]
+
+    def _invalidate():
+        cache.delete_many(keys)
+        for scope in scopes:
+            _bump(scope_version_key(scope))
+
+    transaction.on_commit(_invalidate)
+
+
+class CatalogCacheMixin:
+    """Serve `list`/`retrieve` from the cache, filling it on a miss."""
+
+    def _cached_response(self, key, handler, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(list_key(request), super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        key = detail_key(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return self._cached_response(key, super().retrieve, request, *args, **kwargs)
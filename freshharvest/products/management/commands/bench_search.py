@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.models import Category, Product
+from products.views import ProductViewSet
+from users.models import User
+
+WORDS = [
+    'tomato', 'avocado', 'kale', 'sukuma', 'spinach', 'mango', 'banana', 'onion',
+    'cabbage', 'carrot', 'pepper', 'coriander', 'garlic', 'ginger', 'potato',
+    'organic', 'fresh', 'ripe', 'green', 'red', 'sweet', 'local', 'kiambu',
+    'nyeri', 'limuru', 'hass', 'cherry', 'baby', 'wild', 'farm',
+]
+TERMS = ['tomato', 'tom', 'fresh avocado', 'sukuma', 'tomatos', 'kiambu kale']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ILIKE and PostgreSQL full-text product search backends. "
+        "Grows a synthetic catalog to each --rows size and times a paginated "
+        "?search= page (first 20 rows + COUNT) per term. PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, action='append', help='Catalog sizes (default: 100000 and 1000000)')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the generated rows')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('bench_search needs PostgreSQL')
+
+        tag = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'bench-{tag}', slug=f'bench-{tag}')
+        farmer = User.objects.create_user(
+            username=f'bench-farmer-{tag}', email=f'farmer-{tag}@bench.local',
+            password=None, user_type='farmer',
+        )
+        try:
+            created = 0
+            for rows in sorted(options['rows'] or [100_000, 1_000_000]):
+                created += self.generate(category, farmer, rows - created)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE products_product')
+                self.stdout.write(f'--- {rows} rows ---')
+                for term in TERMS:
+                    timings = {
+                        backend: self.time_search(term, backend, options['repeat'])
+                        for backend in ('ilike', 'postgres')
+                    }
+                    self.stdout.write(
+                        f"{term!r:<18} ilike {timings['ilike']:8.1f} ms | "
+                        f"fulltext {timings['postgres']:8.1f} ms"
+                    )
+        finally:
+            if not options['keep']:
+                # Raw DELETE: skips per-row signals for the generated rows
+                with connection.cursor() as cursor:
+                    cursor.execute('DELETE FROM products_product WHERE category_id = %s', [category.id])
+                category.delete()
+                farmer.delete()
+
+    def generate(self, category, farmer, count, batch_size=5000):
+        rng = random.Random(count)
+        today = date.today()
+        for start in range(0, max(count, 0), batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    name=' '.join(rng.sample(WORDS, 3)).title(),
+                    description=' '.join(rng.choices(WORDS, k=20)),
+                    price=Decimal(rng.randint(20, 900)),
+                    stock_quantity=rng.randint(0, 500),
+                    category=category, farmer=farmer, harvest_date=today,
+                )
+                for _ in range(min(batch_size, count - start))
+            ])
+        return max(count, 0)
+
+    def time_search(self, term, backend, repeat):
+        request = Request(APIRequestFactory().get('/api/products/', {'search': term}))
+        view = ProductViewSet(request=request, action='list', format_kwarg=None)
+        samples = []
+        with override_settings(PRODUCT_SEARCH_BACKEND=backend):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                queryset = view.filter_queryset(view.get_queryset())
+                list(queryset[:20])
+                queryset.count()
+                samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from products.bulk import FORMATS, export_rows
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream products to CSV or JSONL (same layout as import_products)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farmer', help='Only this farmer (email)')
+        parser.add_argument('--file-format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File path (default: stdout)')
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['farmer']:
+            queryset = queryset.filter(farmer__email=options['farmer'])
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in export_rows(queryset, options['file_format']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
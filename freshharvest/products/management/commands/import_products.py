@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.bulk import FORMATS, detect_format, import_products, iter_rows
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk upsert a farmer's products from a CSV or JSONL file (keyed on SKU)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--farmer', required=True, help='Farmer email')
+        parser.add_argument('--file-format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            farmer = User.objects.get(email=options['farmer'], user_type='farmer')
+        except User.DoesNotExist:
+            raise CommandError(f"No farmer with email {options['farmer']}")
+
+        file_format = options['file_format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as fileobj:
+            report = import_products(
+                iter_rows(fileobj, file_format), farmer=farmer, chunk_size=options['chunk_size']
+            )
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} rows, {report['failed']} failed"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Category
+from products.stats import refresh_category_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CategoryStats table from the products table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+        size = options['batch_size']
+        for start in range(0, len(ids), size):
+            refresh_category_stats(ids[start:start + size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(ids)} categories'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.ranking import refresh_rank_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Product.rank_score (freshness, availability, price, "
+        "popularity) in set-based batches. Schedule it at least daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        updated = refresh_rank_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed rank scores for {updated} products'))
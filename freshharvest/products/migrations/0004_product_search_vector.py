@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:09
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+FORWARD_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update();
+    """,
+    f"UPDATE products_product SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};",
+    "CREATE INDEX idx_product_search_vector ON products_product USING gin (search_vector);",
+    "CREATE INDEX idx_product_name_trgm ON products_product USING gin (name gin_trgm_ops);",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS idx_product_name_trgm;",
+    "DROP INDEX IF EXISTS idx_product_search_vector;",
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product;",
+    "DROP FUNCTION IF EXISTS products_product_search_vector_update();",
+]
+
+
+def run_postgres_sql(statements):
+    # Full-text trigger + GIN indexes are PostgreSQL-only
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(REVERSE_SQL)),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def backfill_category_stats(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    CategoryStats = apps.get_model('products', 'CategoryStats')
+    Product = apps.get_model('products', 'Product')
+    aggregates = {
+        row.pop('category_id'): row
+        for row in Product.objects.values('category_id').annotate(
+            product_count=Count('id'),
+            available_count=Count('id', filter=Q(is_available=True)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+            latest_harvest_date=Max('harvest_date'),
+        ).order_by()
+    }
+    CategoryStats.objects.bulk_create([
+        CategoryStats(category_id=cid, **aggregates.get(cid, {}))
+        for cid in Category.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='products.category', verbose_name='Category')),
+                ('product_count', models.PositiveIntegerField(default=0, verbose_name='Products')),
+                ('available_count', models.PositiveIntegerField(default=0, verbose_name='Available Products')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Min Price (KES)')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Max Price (KES)')),
+                ('latest_harvest_date', models.DateField(blank=True, null=True, verbose_name='Latest Harvest Date')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated')),
+            ],
+            options={
+                'verbose_name': 'Category Stats',
+                'verbose_name_plural': 'Category Stats',
+                'indexes': [models.Index(fields=['-product_count'], name='idx_stats_product_count')],
+            },
+        ),
+        migrations.RunPython(backfill_category_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_sku'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rank_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Rank Score'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rank_score', 'id'], name='idx_rank_score_id'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from users.models import User
@@ -68,6 +69,7 @@ class Product(models.Model):
     CORE: Fresh produce inventory with farmer ownership and freshness tracking
     """
     name = models.CharField(max_length=200, verbose_name=_('Product Name'))
+    sku = models.CharField(max_length=64, blank=True, null=True, verbose_name=_('SKU'))
     description = models.TextField(verbose_name=_('Description'))
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_('Price (KES)'))
     stock_quantity = models.PositiveIntegerField(default=0, verbose_name=_('Stock Quantity'))
@@ -94,15 +96,35 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated'))
     
+    # Weighted name (A) + description (B) tsvector, kept current by a
+    # PostgreSQL trigger and GIN-indexed (see migration 0004)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Listing rank (freshness, availability, price, popularity), refreshed in
+    # batches by `products.ranking`; `?ordering=-rank_score` reads the index
+    rank_score = models.FloatField(default=0, editable=False, verbose_name=_('Rank Score'))
+    
     class Meta:
         verbose_name = _('Product')
         verbose_name_plural = _('Products')
         ordering = ['-created_at']
         indexes = [
            models.Index(fields=['category', 'is_available'], name='idx_category_available'),
-            models.Index(fields=['price'], name='idx_price'),
-            models.Index(fields=['harvest_date'], name='idx_harvest_date'),
+            # (ordering field, id) pairs back keyset pagination range scans
+            models.Index(fields=['price', 'id'], name='idx_price_id'),
+            models.Index(fields=['harvest_date', 'id'], name='idx_harvest_date_id'),
+            models.Index(fields=['created_at', 'id'], name='idx_created_at_id'),
+            models.Index(fields=['rank_score', 'id'], name='idx_rank_score_id'),
             models.Index(fields=['farmer'], name='idx_farmer'),
+            # Category stats bound re-reads (products.stats)
+            models.Index(fields=['category', 'price'], name='idx_category_price'),
+            models.Index(fields=['category', 'harvest_date'], name='idx_category_harvest_date'),
+            # Directory available-product counts/has_products probes
+            models.Index(fields=['farmer'], name='idx_farmer_available', condition=models.Q(is_available=True)),
+        ]
+        constraints = [
+            # Upsert key for bulk imports (NULL SKUs never conflict)
+            models.UniqueConstraint(fields=['farmer', 'sku'], name='uniq_farmer_sku'),
         ]
     
     def save(self, *args, **kwargs):
@@ -110,4 +132,34 @@ class Product(models.Model):
         super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"{self.name} - {self.category.name} ({self.farmer.username})"
\ No newline at end of file
+        return f"{self.name} - {self.category.name} ({self.farmer.username})"
+
+
+class CategoryStats(models.Model):
+    """
+    Per-category product numbers, maintained by `products.stats` so category
+    listings never aggregate over the products table
+    """
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name=_('Category')
+    )
+    product_count = models.PositiveIntegerField(default=0, verbose_name=_('Products'))
+    available_count = models.PositiveIntegerField(default=0, verbose_name=_('Available Products'))
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name=_('Min Price (KES)'))
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name=_('Max Price (KES)'))
+    latest_harvest_date = models.DateField(null=True, blank=True, verbose_name=_('Latest Harvest Date'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated'))
+    
+    class Meta:
+        verbose_name = _('Category Stats')
+        verbose_name_plural = _('Category Stats')
+        indexes = [
+            models.Index(fields=['-product_count'], name='idx_stats_product_count'),
+        ]
+    
+    def __str__(self):
+        return f"{self.category_id}: {self.product_count} products"
@@ -0,0 +1,112 @@
+"""
+Precomputed listing rank (`Product.rank_score`).
+
+The score is a weighted sum (`PRODUCT_RANKING_WEIGHTS`) of four 0..1
+components:
+
+- freshness: 1 for today's harvest, falling linearly to 0 after
+  `PRODUCT_RANKING_FRESHNESS_DAYS`,
+- availability: 0 when sold out, 0.5 below `PRODUCT_RANKING_LOW_STOCK`
+  units, 1 otherwise,
+- price: 1 for the cheapest product of its category, 0 for the dearest
+  (from `CategoryStats`),
+- popularity: u / (u + `PRODUCT_RANKING_POPULARITY_HALF`) for the units `u`
+  sold over the last `PRODUCT_RANKING_POPULARITY_DAYS` (from the farmer
+  sales rollups).
+
+`refresh_rank_scores` writes it with one set-based UPDATE per id batch, so
+listings ordered by rank read the (rank_score, id) index instead of
+computing anything per request. Freshness decays daily: run
+`manage.py refresh_rank_scores` from cron/a scheduler at least once a day
+(hourly keeps availability and popularity closer to live).
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import add
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.utils import timezone
+
+from orders.models import FarmerDailySales
+from .cache import invalidate_lists
+from .models import CategoryStats, Product
+
+DEFAULT_WEIGHTS = {'freshness': 0.4, 'availability': 0.2, 'price': 0.15, 'popularity': 0.25}
+
+
+def _float(expression):
+    return Cast(expression, output_field=FloatField())
+
+
+def freshness_component(today):
+    days = getattr(settings, 'PRODUCT_RANKING_FRESHNESS_DAYS', 14)
+    return Case(
+        *[When(harvest_date__gte=today - timedelta(days=age), then=Value(1 - age / days)) for age in range(days)],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def availability_component():
+    return Case(
+        When(is_available=False, then=Value(0.0)),
+        When(stock_quantity__lt=getattr(settings, 'PRODUCT_RANKING_LOW_STOCK', 10), then=Value(0.5)),
+        default=Value(1.0),
+        output_field=FloatField(),
+    )
+
+
+def price_component():
+    stats = CategoryStats.objects.filter(category_id=OuterRef('category_id'))
+    high = _float(Subquery(stats.values('max_price')[:1]))
+    # NULL for single-price (or not yet aggregated) categories -> scores 1
+    spread = Case(When(min_price__lt=F('max_price'), then=F('max_price') - F('min_price')), default=None)
+    spread = _float(Subquery(stats.annotate(spread=spread).values('spread')[:1]))
+    ratio = Coalesce((high - _float(F('price'))) / spread, Value(1.0))
+    return Greatest(Least(ratio, Value(1.0)), Value(0.0))
+
+
+def popularity_component(today):
+    since = today - timedelta(days=getattr(settings, 'PRODUCT_RANKING_POPULARITY_DAYS', 30))
+    half = float(getattr(settings, 'PRODUCT_RANKING_POPULARITY_HALF', 20))
+    units = FarmerDailySales.objects.filter(product_id=OuterRef('pk'), day__gte=since).values('product_id').annotate(
+        total=Sum('units')
+    ).values('total')
+    units = _float(Coalesce(Subquery(units), 0))
+    return units / (units + Value(half))
+
+
+def score_expression(today=None):
+    today = today or timezone.localdate()
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'PRODUCT_RANKING_WEIGHTS', {})}
+    components = {
+        'freshness': freshness_component(today),
+        'availability': availability_component(),
+        'price': price_component(),
+        'popularity': popularity_component(today),
+    }
+    return _float(reduce(add, (
+        Value(float(weights[name])) * expression for name, expression in components.items()
+    )))
+
+
+def refresh_rank_scores(product_ids=None, batch_size=5000, today=None):
+    """Recompute `rank_score` (for `product_ids`, else every product); returns rows updated."""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    score = score_expression(today)
+
+    updated, last_id = 0, 0
+    while True:
+        ids = list(products.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Each batch is its own statement, so row locks stay short
+        updated += products.filter(id__gte=ids[0], id__lte=ids[-1]).update(rank_score=score)
+        last_id = ids[-1]
+    if updated:
+        invalidate_lists()
+    return updated
@@ -1,12 +1,24 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Category, Product
+from .models import Category, CategoryStats, Product
+
+class CategoryStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryStats
+        fields = [
+            'product_count', 'available_count', 'min_price',
+            'max_price', 'latest_harvest_date'
+        ]
 
 class CategorySerializer(serializers.ModelSerializer):
+    stats = CategoryStatsSerializer(read_only=True)
+    
     class Meta:
         model = Category
         fields = [
             'id', 'name', 'slug', 'description', 
-            'image', 'created_at'
+            'image', 'created_at', 'stats'
         ]
         read_only_fields = ['id', 'created_at']
     
@@ -25,7 +37,7 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'description', 'price', 'stock_quantity',
+            'id', 'sku', 'name', 'description', 'price', 'stock_quantity',
             'category', 'category_name', 'farmer', 'farmer_name',
             'harvest_date', 'is_available', 'image', 'weight_per_unit',
             'created_at', 'updated_at'
@@ -40,4 +52,46 @@ class ProductSerializer(serializers.ModelSerializer):
     def validate_price(self, value):
         if value <= 0:
             raise serializers.ValidationError("Price must be positive")
-        return value
\ No newline at end of file
+        return value
+
+class ProductPatchSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False)
+    stock_quantity = serializers.IntegerField(min_value=0, max_value=2147483647, required=False)
+
+    def validate(self, attrs):
+        if 'price' not in attrs and 'stock_quantity' not in attrs:
+            raise serializers.ValidationError('Give price and/or stock_quantity.')
+        return attrs
+
+class BulkProductPatchSerializer(serializers.Serializer):
+    updates = ProductPatchSerializer(many=True, min_length=1, max_length=1000)
+
+    def validate_updates(self, updates):
+        ids = [update['id'] for update in updates]
+        duplicates = sorted({pk for pk in ids if ids.count(pk) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f'Duplicate product ids: {duplicates}')
+        return updates
+
+class ProductImportRowSerializer(ProductSerializer):
+    """
+    One bulk-import row: ProductSerializer rules, but the category is given by
+    slug and resolved from `context['categories']` (slug -> id, loaded once
+    per chunk) instead of one query per row.
+    """
+    sku = serializers.CharField(max_length=64)
+    category = serializers.SlugField()
+    
+    class Meta(ProductSerializer.Meta):
+        fields = [
+            'sku', 'name', 'description', 'price', 'stock_quantity',
+            'category', 'harvest_date', 'image', 'weight_per_unit'
+        ]
+        validators = []
+    
+    def validate_category(self, value):
+        category_id = self.context['categories'].get(value)
+        if category_id is None:
+            raise serializers.ValidationError(f"Unknown category '{value}'.")
+        return category_id
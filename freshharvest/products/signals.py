@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_products
+from .models import Category, CategoryStats, Product
+from .stats import STATE_FIELDS, ProductState, record_changes, state_of
+from .stream import publish_product
+
+
+@receiver(pre_save, sender=Product)
+def remember_old_state(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Stats are moved by deltas, so they need the row as it was
+    instance._old_state = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is None or {'category', 'is_available', 'price', 'harvest_date', 'stock_quantity'} & set(update_fields):
+        row = Product.objects.filter(pk=instance.pk).values_list(*STATE_FIELDS).first()
+        instance._old_state = ProductState(*row) if row else None
+
+
+def _invalidate(product, old_state=None):
+    categories = {product.category_id}
+    if old_state is not None:
+        categories.add(old_state.category_id)
+    invalidate_products([product.pk], categories=categories, farmers=[product.farmer_id])
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, **kwargs):
+    _invalidate(instance, instance._old_state)
+    if not raw and (created or instance._old_state is not None):
+        record_changes([(instance._old_state, state_of(instance))])
+    publish_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    _invalidate(instance)
+    record_changes([(state_of(instance), None)])
+    publish_product(instance, deleted=True)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # Product payloads embed category_name
+    rows = list(Product.objects.filter(category_id=instance.pk).values_list('id', 'farmer_id'))
+    invalidate_products(
+        [pk for pk, _ in rows], categories=[instance.pk], farmers={farmer_id for _, farmer_id in rows}
+    )
+
+
+@receiver(post_save, sender=Category)
+def create_category_stats(sender, instance, created, raw=False, **kwargs):
+    # In the same transaction, so stats deltas of its first products find it
+    if created and not raw:
+        CategoryStats.objects.get_or_create(category=instance)
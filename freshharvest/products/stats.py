@@ -0,0 +1,174 @@
+"""
+Maintenance of the denormalized `CategoryStats` table.
+
+Writes never aggregate over a category. Each write path reports the
+before/after `ProductState` of the products it touched, and after commit
+`record_changes` applies them as per-category deltas, one UPDATE per
+affected category:
+
+- `product_count` / `available_count` move with `F()` increments,
+- `min_price`, `max_price` and `latest_harvest_date` only move when a new
+  value crosses the stored bound, and are re-read from the products table
+  only when the product that held the bound changed or left.
+
+Checkout stock deductions that sell nothing out cost no stats query at all.
+A category's (empty) stats row is created with the category, so deltas
+always have a row to move; `refresh_category_stats` (full recompute) is
+only used by `manage.py rebuild_category_stats` and the benchmark seed.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Category, CategoryStats, Product
+
+STATS_FIELDS = ['product_count', 'available_count', 'min_price', 'max_price', 'latest_harvest_date', 'updated_at']
+
+# What the stats depend on; `Product.objects.values_list(*STATE_FIELDS)`
+# rows map straight onto it
+STATE_FIELDS = ('category_id', 'is_available', 'price', 'harvest_date')
+ProductState = namedtuple('ProductState', STATE_FIELDS)
+
+
+def state_of(product):
+    """`ProductState` of an in-memory product (values normalised like a DB read)."""
+    opts = product._meta
+    return ProductState(
+        product.category_id,
+        bool(product.is_available),
+        opts.get_field('price').to_python(product.price),
+        opts.get_field('harvest_date').to_python(product.harvest_date),
+    )
+
+
+def refresh_category_stats(category_ids=None):
+    """Recompute stats for `category_ids` (ids or a values() subquery; all when None)."""
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(id__in=category_ids)
+    ids = list(categories.values_list('id', flat=True))
+    if not ids:
+        return 0
+
+    aggregates = {
+        row.pop('category_id'): row
+        for row in Product.objects.filter(category_id__in=ids).values('category_id').annotate(
+            product_count=Count('id'),
+            available_count=Count('id', filter=Q(is_available=True)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+            latest_harvest_date=Max('harvest_date'),
+        ).order_by()
+    }
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(category_id=cid, **aggregates.get(cid, {})) for cid in ids],
+        update_conflicts=True,
+        unique_fields=['category'],
+        update_fields=STATS_FIELDS,
+    )
+    return len(ids)
+
+
+class _Delta:
+    def __init__(self):
+        self.products = self.available = 0
+        self.prices, self.dates = [], []
+        self.departed_prices, self.departed_dates = set(), set()
+
+
+def _fold(changes):
+    deltas = defaultdict(_Delta)
+    for old, new in changes:
+        if old == new:
+            continue
+        moved = old is None or new is None or old.category_id != new.category_id
+        if old is not None:
+            delta = deltas[old.category_id]
+            delta.products -= moved
+            delta.available -= old.is_available
+            if moved or old.price != new.price:
+                delta.departed_prices.add(old.price)
+            if moved or old.harvest_date != new.harvest_date:
+                delta.departed_dates.add(old.harvest_date)
+        if new is not None:
+            delta = deltas[new.category_id]
+            delta.products += moved
+            delta.available += new.is_available
+            if moved or old.price != new.price:
+                delta.prices.append(new.price)
+            if moved or old.harvest_date != new.harvest_date:
+                delta.dates.append(new.harvest_date)
+    return deltas
+
+
+def _bound(category_id, field, source, aggregate, departed, arrived):
+    """CASE moving one stored bound (`aggregate` is Min or Max)."""
+    branches = []
+    if departed:
+        # The bound's holder changed: re-read it from the (category, field) index
+        order = source if aggregate is Min else f'-{source}'
+        current = Product.objects.filter(category_id=category_id).order_by(order).values(source)[:1]
+        branches.append(When(**{f'{field}__in': departed}, then=Subquery(current)))
+    if arrived:
+        best = min(arrived) if aggregate is Min else max(arrived)
+        beaten = Q(**{f'{field}__gt' if aggregate is Min else f'{field}__lt': best})
+        branches.append(When(Q(**{f'{field}__isnull': True}) | beaten, then=Value(best)))
+    if not branches:
+        return None
+    return Case(*branches, default=F(field), output_field=CategoryStats._meta.get_field(field))
+
+
+def _moved(field, delta):
+    # Clamped: a lost delta must not fail later writes (rebuild_category_stats repairs drift)
+    return Greatest(F(field) + delta, Value(0))
+
+
+def _update(category_id, updates):
+    CategoryStats.objects.filter(category_id=category_id).update(updated_at=timezone.now(), **updates)
+
+
+def apply_changes(changes):
+    """Apply (old, new) `ProductState` pairs (None = no such product) to the stats now."""
+    for category_id, delta in _fold(changes).items():
+        updates = {}
+        if delta.products:
+            updates['product_count'] = _moved('product_count', delta.products)
+        if delta.available:
+            updates['available_count'] = _moved('available_count', delta.available)
+        for field, source, aggregate, departed, arrived in (
+            ('min_price', 'price', Min, delta.departed_prices, delta.prices),
+            ('max_price', 'price', Max, delta.departed_prices, delta.prices),
+            ('latest_harvest_date', 'harvest_date', Max, delta.departed_dates, delta.dates),
+        ):
+            expression = _bound(category_id, field, source, aggregate, departed, arrived)
+            if expression is not None:
+                updates[field] = expression
+        if updates:
+            _update(category_id, updates)
+
+
+def record_changes(changes):
+    """Apply (old, new) `ProductState` pairs once the transaction commits."""
+    changes = [(old, new) for old, new in changes if old != new]
+    if changes:
+        transaction.on_commit(lambda: apply_changes(changes))
+
+
+def record_availability(category_ids, available):
+    """
+    Products of `category_ids` (one entry per product) became available
+    (`available=True`) or sold out, with price and harvest date unchanged.
+    """
+    counts = defaultdict(int)
+    for category_id in category_ids:
+        counts[category_id] += 1 if available else -1
+    if not counts:
+        return
+
+    def apply():
+        for category_id, count in counts.items():
+            _update(category_id, {'available_count': _moved('available_count', count)})
+    transaction.on_commit(apply)
@@ -0,0 +1,133 @@
+"""
+Live stock/availability deltas over server-sent events.
+
+`hub` is an in-process broadcast hub. Product saves (`products.signals`),
+checkout stock deductions and bulk imports publish `{id, stock_quantity,
+is_available}` events once their transaction commits; each SSE connection
+holds a small asyncio queue fed from any thread with
+`call_soon_threadsafe`. Nothing is published, and no extra query runs, while
+there are no subscribers.
+
+The hub is per process: with several workers, each worker only sees the
+writes it made itself, so deployments that need cross-worker fan-out should
+feed `hub.publish` from a shared channel (e.g. Postgres LISTEN/NOTIFY).
+A subscriber that falls behind by more than `STOCK_STREAM_QUEUE_SIZE`
+batches gets a `resync` event and should refetch the products it shows.
+"""
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Product
+
+RESYNC = object()
+
+
+class Subscription:
+    def __init__(self, loop, product_ids, queue_size):
+        self.loop = loop
+        self.product_ids = product_ids
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, batch):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            batch = RESYNC
+        self.queue.put_nowait(batch)
+
+
+class StockHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, product_ids=None):
+        """Register a subscriber on the running event loop."""
+        queue_size = getattr(settings, 'STOCK_STREAM_QUEUE_SIZE', 100)
+        subscription = Subscription(asyncio.get_running_loop(), product_ids, queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events):
+        """Fan `events` out to matching subscribers; safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            events = [{**event, 'event_id': next(self._ids)} for event in events]
+        for subscription in subscribers:
+            wanted = subscription.product_ids
+            batch = [event for event in events if wanted is None or event['id'] in wanted]
+            if not batch:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, batch)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(subscription)
+
+
+hub = StockHub()
+
+
+def publish_product(product, deleted=False):
+    """Publish one saved/deleted product's stock state after commit."""
+    if not hub.subscriber_count:
+        return
+    event = {
+        'id': product.pk,
+        'stock_quantity': 0 if deleted else product.stock_quantity,
+        'is_available': False if deleted else product.is_available,
+    }
+    transaction.on_commit(lambda: hub.publish([event]))
+
+
+def publish_stock_changes(product_ids):
+    """Publish the committed stock state of `product_ids` (one query, only if subscribed)."""
+    product_ids = list(product_ids)
+    if not product_ids or not hub.subscriber_count:
+        return
+
+    def send():
+        rows = Product.objects.filter(id__in=product_ids).values('id', 'stock_quantity', 'is_available')
+        hub.publish(list(rows))
+
+    transaction.on_commit(send)
+
+
+def format_event(event):
+    payload = {key: value for key, value in event.items() if key != 'event_id'}
+    return f"id: {event['event_id']}\nevent: stock\ndata: {json.dumps(payload)}\n\n"
+
+
+async def event_stream(product_ids, heartbeat):
+    """SSE body for one subscriber; unsubscribes when the client goes away."""
+    subscription = hub.subscribe(product_ids)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                batch = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if batch is RESYNC:
+                yield 'event: resync\ndata: {}\n\n'
+                continue
+            yield ''.join(format_event(event) for event in batch)
+    finally:
+        hub.unsubscribe(subscription)
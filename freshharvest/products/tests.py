@@ -1,3 +1,513 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import asyncio
+import json
+import threading
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from freshharvest.instrumentation import stats as perf_stats
+from users.models import User
+from .models import Category, Product
+from .stats import refresh_category_stats
+from .stream import RESYNC, hub, publish_stock_changes
+
+
+class ProductsAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.farmer = User.objects.create_user(
+            username='farmer', email='farmer@example.com', password='pass12345', user_type='farmer'
+        )
+        self.category = Category.objects.create(name='Vegetables')
+
+    def make_product(self, **kwargs):
+        fields = {
+            'name': 'Tomatoes', 'description': 'Fresh', 'price': Decimal('50.00'),
+            'stock_quantity': 10, 'category': self.category, 'farmer': self.farmer,
+            'harvest_date': date.today(),
+        }
+        fields.update(kwargs)
+        return Product.objects.create(**fields)
+
+
+class CatalogCacheTestCase(ProductsAPITestCase):
+    def test_list_is_served_from_cache_for_equivalent_queries(self):
+        self.make_product()
+        response = self.client.get('/api/products/?ordering=price&search=')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/?ordering=price')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_product_save_invalidates_list_and_detail(self):
+        product = self.make_product()
+        self.client.get('/api/products/')
+        self.client.get(f'/api/products/{product.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock_quantity = 0
+            product.save()
+
+        response = self.client.get(f'/api/products/{product.id}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertFalse(response.data['is_available'])
+        response = self.client.get('/api/products/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_update_keeps_other_categories_and_farmers_lists_cached(self):
+        product = self.make_product()
+        fruits = Category.objects.create(name='Fruits')
+        grower = User.objects.create_user(
+            username='grower', email='grower@example.com', password='pass12345', user_type='farmer'
+        )
+        self.make_product(name='Mangoes', category=fruits, farmer=grower)
+        urls = {
+            'all': '/api/products/',
+            'category': f'/api/products/?category={self.category.id}',
+            'farmer': f'/api/products/?farmer={self.farmer.id}',
+            'other category': f'/api/products/?category={fruits.id}',
+            'other farmer': f'/api/products/?farmer={grower.id}&ordering=price',
+        }
+        for url in urls.values():
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock_quantity = 3
+            product.save()
+
+        self.assertEqual({name: self.client.get(url)['X-Cache'] for name, url in urls.items()}, {
+            'all': 'MISS', 'category': 'MISS', 'farmer': 'MISS',
+            'other category': 'HIT', 'other farmer': 'HIT',
+        })
+
+    def test_moving_a_product_drops_both_categories_lists(self):
+        product = self.make_product()
+        fruits = Category.objects.create(name='Fruits')
+        urls = [f'/api/products/?category={self.category.id}', f'/api/products/?category={fruits.id}']
+        for url in urls:
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.category = fruits
+            product.save()
+
+        self.assertEqual([self.client.get(url).data['count'] for url in urls], [0, 1])
+
+    def test_category_rename_invalidates_product_detail(self):
+        product = self.make_product()
+        self.client.get(f'/api/products/{product.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Greens'
+            self.category.save()
+
+        response = self.client.get(f'/api/products/{product.id}/')
+        self.assertEqual(response.data['category_name'], 'Greens')
+
+    def test_checkout_invalidates_product_detail(self):
+        product = self.make_product(stock_quantity=2)
+        buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass12345')
+        self.client.get(f'/api/products/{product.id}/')
+
+        self.client.force_authenticate(buyer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/checkout/', {
+                'delivery_address': 'Kilimani',
+                'cart_items': [{'product_id': product.id, 'quantity': 2}],
+            }, format='json')
+
+        response = self.client.get(f'/api/products/{product.id}/')
+        self.assertEqual(response.data['stock_quantity'], 0)
+
+    def test_cache_stats_requires_admin(self):
+        response = self.client.get('/api/products/cache-stats/')
+        self.assertIn(response.status_code, (401, 403))
+
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345')
+        self.client.force_authenticate(admin)
+        self.client.get('/api/products/')
+        self.client.get('/api/products/')
+        response = self.client.get('/api/products/cache-stats/')
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+
+
+class AsyncCatalogTestCase(ProductsAPITestCase):
+    def test_async_list_and_detail_match_sync_endpoints(self):
+        products = [self.make_product(name=f'Kale {i}', price=Decimal(10 + i)) for i in range(3)]
+        perf_stats.reset()
+
+        sync_list = self.client.get('/api/products/?ordering=-price').json()
+        async_list = async_to_sync(self.async_client.get)('/api/products/async/?ordering=-price').json()
+        self.assertEqual(async_list['count'], 3)
+        self.assertEqual(async_list['results'], sync_list['results'])
+
+        sync_detail = self.client.get(f'/api/products/{products[0].id}/').json()
+        async_detail = async_to_sync(self.async_client.get)(f'/api/products/async/{products[0].id}/')
+        self.assertEqual(async_detail.json(), sync_detail)
+        missing = async_to_sync(self.async_client.get)('/api/products/async/999999/')
+        self.assertEqual(missing.status_code, 404)
+
+        # The instrumentation middleware ran natively and still saw the queries
+        summary = perf_stats.summary()
+        self.assertEqual(summary['GET product-list-async']['queries_max'], 2)
+        self.assertEqual(summary['GET product-detail-async']['queries_max'], 1)
+
+    def test_async_category_list_and_filters(self):
+        self.make_product(stock_quantity=0, is_available=False)
+        self.make_product()
+        response = async_to_sync(self.async_client.get)('/api/products/async/?is_available=true')
+        self.assertEqual(response.json()['count'], 1)
+        response = async_to_sync(self.async_client.get)('/api/products/async/categories/')
+        self.assertEqual(response.json()['results'][0]['name'], 'Vegetables')
+        self.assertEqual(async_to_sync(self.async_client.post)('/api/products/async/').status_code, 405)
+
+
+class StockStreamTestCase(ProductsAPITestCase):
+    def set_stock(self, product, stock):
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock_quantity = stock
+            product.save()
+
+    async def test_stream_pushes_stock_changes_for_watched_products(self):
+        watched, other = await sync_to_async(lambda: [self.make_product(), self.make_product()])()
+        response = await self.async_client.get(f'/api/products/stream/stock/?products={watched.id}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await asyncio.wait_for(anext(chunks), 2), b'retry: 5000\n\n')
+        self.assertEqual(hub.subscriber_count, 1)
+
+        await sync_to_async(self.set_stock)(other, 1)
+        await sync_to_async(self.set_stock)(watched, 0)
+        chunk = (await asyncio.wait_for(anext(chunks), 2)).decode()
+        self.assertIn('event: stock', chunk)
+        data = json.loads(chunk.split('data: ')[1])
+        self.assertEqual(data, {'id': watched.id, 'stock_quantity': 0, 'is_available': False})
+
+        # Client disconnect: ASGI cancels the task waiting on the stream
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(hub.subscriber_count, 0)
+
+    async def test_hub_delivers_across_threads_and_resyncs_slow_subscribers(self):
+        with self.settings(STOCK_STREAM_QUEUE_SIZE=2):
+            subscription = hub.subscribe()
+        try:
+            publisher = threading.Thread(target=lambda: [hub.publish([{'id': n}]) for n in range(5)])
+            publisher.start()
+            publisher.join()
+            await asyncio.sleep(0)
+            batches = []
+            while not subscription.queue.empty():
+                batches.append(subscription.queue.get_nowait())
+            # Overflowing the 2-batch backlog replaced it with a resync marker
+            self.assertIs(batches[-1], RESYNC)
+            self.assertLessEqual(len(batches), 2)
+        finally:
+            hub.unsubscribe(subscription)
+
+    def test_no_subscribers_means_no_extra_queries(self):
+        product = self.make_product()
+        with self.assertNumQueries(0), self.captureOnCommitCallbacks(execute=True):
+            publish_stock_changes([product.id])
+
+    def test_rejects_bad_product_ids(self):
+        response = self.client.get('/api/products/stream/stock/?products=a,b')
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTestCase(ProductsAPITestCase):
+    def test_cursor_pages_are_stable_with_duplicate_ordering_values(self):
+        products = [self.make_product(name=f'Lot {i}', price=Decimal(10 + i % 3)) for i in range(45)]
+        expected = [p.id for p in sorted(products, key=lambda p: (p.price, p.id))]
+
+        seen, pages = [], []
+        url = '/api/products/?pagination=cursor&ordering=price'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen += [row['id'] for row in response.data['results']]
+            pages.append(response.data)
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], expected[20:40])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], expected[:20])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/api/products/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class RankingTestCase(ProductsAPITestCase):
+    def test_ranked_listing_orders_by_precomputed_score(self):
+        from orders.models import FarmerDailySales
+        from .ranking import refresh_rank_scores
+
+        fresh = self.make_product(name='Fresh', price=Decimal('40.00'), stock_quantity=20)
+        week_old = self.make_product(
+            name='Week old', price=Decimal('40.00'), stock_quantity=20, harvest_date=date.today() - timedelta(days=7)
+        )
+        dear = self.make_product(name='Dear', price=Decimal('60.00'), stock_quantity=5)
+        sold_out = self.make_product(name='Sold out', price=Decimal('50.00'), stock_quantity=0)
+        FarmerDailySales.objects.create(
+            farmer=self.farmer, product=sold_out, day=date.today(), units=20, revenue=Decimal('1000.00')
+        )
+        refresh_category_stats([self.category.id])
+
+        self.assertEqual(refresh_rank_scores(batch_size=3), 4)
+        scores = dict(Product.objects.values_list('id', 'rank_score'))
+        # 0.4 freshness + 0.2 availability + 0.15 price + 0.25 popularity
+        self.assertAlmostEqual(scores[fresh.id], 0.75)
+        self.assertAlmostEqual(scores[week_old.id], 0.55)
+        self.assertAlmostEqual(scores[dear.id], 0.5)
+        self.assertAlmostEqual(scores[sold_out.id], 0.4 + 0.075 + 0.125)
+
+        expected = [fresh.id, sold_out.id, week_old.id, dear.id]
+        response = self.client.get('/api/products/?ordering=-rank_score')
+        self.assertEqual([row['id'] for row in response.data['results']], expected)
+        response = self.client.get('/api/products/?ordering=-rank_score&pagination=cursor')
+        self.assertEqual([row['id'] for row in response.data['results']], expected)
+
+
+class ProductSearchTestCase(ProductsAPITestCase):
+    def test_search_parameter_matches_name_and_description(self):
+        tomato = self.make_product(name='Cherry Tomatoes')
+        kale = self.make_product(name='Kale', description='Grown next to the tomatoes')
+        self.make_product(name='Avocado', description='Hass')
+
+        response = self.client.get('/api/products/?search=tomato')
+        self.assertEqual({row['id'] for row in response.data['results']}, {tomato.id, kale.id})
+
+    def test_search_rejects_cursor_pagination(self):
+        response = self.client.get('/api/products/?search=tomato&pagination=cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('search', response.data)
+
+    def test_prefix_query_strips_tsquery_syntax(self):
+        from .search import prefix_tsquery
+
+        self.assertEqual(prefix_tsquery(['&|!']), '')
+        self.assertEqual(prefix_tsquery(['fresh', "tom's"]), 'fresh:* & tom:* & s:*')
+
+
+class CategoryStatsTestCase(ProductsAPITestCase):
+    def test_stats_follow_product_changes_and_checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tomato = self.make_product(price=Decimal('40.00'), stock_quantity=1)
+            self.make_product(name='Kale', price=Decimal('90.00'), harvest_date=date(2026, 1, 1))
+        stats = self.category.stats
+        stats.refresh_from_db()
+        self.assertEqual((stats.product_count, stats.available_count), (2, 2))
+        self.assertEqual((stats.min_price, stats.max_price), (Decimal('40.00'), Decimal('90.00')))
+
+        buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass12345')
+        self.client.force_authenticate(buyer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/checkout/', {
+                'delivery_address': 'Kilimani',
+                'cart_items': [{'product_id': tomato.id, 'quantity': 1}],
+            }, format='json')
+        stats.refresh_from_db()
+        self.assertEqual(stats.available_count, 1)
+
+        fruits = Category.objects.create(name='Fruits')
+        with self.captureOnCommitCallbacks(execute=True):
+            tomato.category = fruits
+            tomato.save()
+        stats.refresh_from_db()
+        fruits.stats.refresh_from_db()
+        self.assertEqual(stats.product_count, 1)
+        self.assertEqual((stats.min_price, stats.max_price), (Decimal('90.00'), Decimal('90.00')))
+        self.assertEqual((fruits.stats.product_count, fruits.stats.min_price), (1, Decimal('40.00')))
+
+    def test_deltas_never_aggregate_the_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            products = [self.make_product(price=Decimal(price), stock_quantity=5) for price in ('30', '50', '70')]
+        stats = self.category.stats
+
+        def stats_queries(change):
+            with CaptureQueriesContext(connection) as ctx:
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+            stats.refresh_from_db()
+            return [q['sql'] for q in ctx.captured_queries if 'products_categorystats' in q['sql']]
+
+        # A checkout line that leaves stock touches no stats row at all
+        from orders.checkout import deduct_stock
+        self.assertEqual(stats_queries(lambda: deduct_stock({products[0].id: 1}, {p.id: p for p in products})), [])
+        self.assertEqual(stats.available_count, 3)
+
+        # Selling out is one F() increment, no aggregate
+        products[1].refresh_from_db()
+        queries = stats_queries(lambda: deduct_stock({products[1].id: 5}, {products[1].id: products[1]}))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('products_product', queries[0])
+        self.assertEqual(stats.available_count, 2)
+
+        # A price inside the bounds leaves them alone; the cheapest product
+        # going away re-reads the minimum (one UPDATE each)
+        products[1].refresh_from_db()
+        products[1].price = Decimal('60.00')
+        self.assertEqual(len(stats_queries(products[1].save)), 1)
+        self.assertEqual((stats.min_price, stats.max_price), (Decimal('30.00'), Decimal('70.00')))
+
+        self.assertEqual(len(stats_queries(products[0].delete)), 1)
+        self.assertEqual(
+            (stats.product_count, stats.available_count, stats.min_price, stats.max_price),
+            (2, 1, Decimal('60.00'), Decimal('70.00')),
+        )
+
+    def test_popular_reads_stats_without_scanning_products(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_product()
+            Category.objects.create(name='Empty')
+
+        self.client.force_authenticate(self.farmer)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/products/categories/popular/')
+        self.assertEqual([row['name'] for row in response.data], ['Vegetables'])
+        self.assertEqual(response.data[0]['stats']['product_count'], 1)
+
+
+class BulkImportExportTestCase(ProductsAPITestCase):
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_authenticate(self.farmer)
+        return self.client.post('/api/products/import/', {
+            'file': SimpleUploadedFile(name, content.encode()),
+        }, format='multipart')
+
+    def test_csv_import_upserts_and_reports_bad_rows(self):
+        self.category.slug = 'vegetables'
+        self.category.save()
+        existing = self.make_product(sku='TOM-1', stock_quantity=5)
+
+        response = self.upload('stock.csv', (
+            'sku,name,description,price,stock_quantity,category,harvest_date\n'
+            'TOM-1,Tomatoes,Ripe,55.00,0,vegetables,2026-10-01\n'
+            'KALE-1,Kale,Leafy,30.00,12,vegetables,2026-10-01\n'
+            'BAD-1,Bad,Row,-1,3,vegetables,2026-10-01\n'
+            'BAD-2,Bad,Row,10,3,fruits,2026-10-01\n'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4])
+        self.assertIn('price', response.data['errors'][0]['errors'])
+        self.assertIn('category', response.data['errors'][1]['errors'])
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.price, existing.stock_quantity, existing.is_available), (Decimal('55.00'), 0, False))
+        self.assertTrue(Product.objects.get(sku='KALE-1').is_available)
+
+    def test_jsonl_import_and_streaming_export_round_trip(self):
+        self.category.slug = 'vegetables'
+        self.category.save()
+        response = self.upload('stock.jsonl', (
+            '{"sku": "AVO-1", "name": "Avocado", "description": "Hass", "price": "20.00",'
+            ' "stock_quantity": 4, "category": "vegetables", "harvest_date": "2026-10-01"}\n'
+            'not json\n'
+        ))
+        self.assertEqual((response.data['imported'], response.data['failed']), (1, 1))
+
+        response = self.client.get('/api/products/export/?file_format=jsonl')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"sku": "AVO-1"', lines[0])
+
+    def test_import_requires_farmer(self):
+        buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass12345')
+        self.client.force_authenticate(buyer)
+        response = self.client.post('/api/products/import/', {}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkPatchTestCase(ProductsAPITestCase):
+    def patch(self, updates):
+        return self.client.patch('/api/products/bulk/', {'updates': updates}, format='json')
+
+    def test_patch_updates_own_products_in_one_statement(self):
+        tomato = self.make_product(price=Decimal('40.00'), stock_quantity=0)
+        kale = self.make_product(name='Kale', price=Decimal('30.00'), stock_quantity=8)
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass12345', user_type='farmer'
+        )
+        foreign = self.make_product(name='Onions', farmer=other, stock_quantity=3)
+        refresh_category_stats([self.category.id])
+        self.client.force_authenticate(self.farmer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.patch([
+                    {'id': tomato.id, 'price': '45.50', 'stock_quantity': 12},
+                    {'id': kale.id, 'stock_quantity': 0},
+                    {'id': foreign.id, 'stock_quantity': 0},
+                    {'id': 999999, 'price': '1.00'},
+                ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [
+            {'id': tomato.id, 'is_available': True}, {'id': kale.id, 'is_available': False},
+        ])
+        self.assertEqual(response.data['not_found'], [foreign.id, 999999])
+        self.assertEqual(sum(q['sql'].startswith('WITH') for q in ctx.captured_queries), 1)
+
+        tomato.refresh_from_db()
+        kale.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((tomato.price, tomato.stock_quantity, tomato.is_available), (Decimal('45.50'), 12, True))
+        self.assertEqual((kale.price, kale.stock_quantity, kale.is_available), (Decimal('30.00'), 0, False))
+        self.assertEqual(foreign.stock_quantity, 3)
+        stats = self.category.stats
+        stats.refresh_from_db()
+        self.assertEqual((stats.available_count, stats.max_price), (2, Decimal('50.00')))
+
+    def test_patch_rejects_invalid_batches(self):
+        product = self.make_product()
+        self.client.force_authenticate(self.farmer)
+        for updates in (
+            [],
+            [{'id': product.id}],
+            [{'id': product.id, 'stock_quantity': -1}],
+            [{'id': product.id, 'price': '0'}],
+            [{'id': product.id, 'price': '10'}, {'id': product.id, 'stock_quantity': 1}],
+        ):
+            self.assertEqual(self.patch(updates).status_code, 400, updates)
+
+        buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass12345')
+        self.client.force_authenticate(buyer)
+        self.assertEqual(self.patch([{'id': product.id, 'stock_quantity': 0}]).status_code, 403)
+
+
+class CategoryAdminTestCase(ProductsAPITestCase):
+    @override_settings(ADMIN_CATEGORY_INLINE_LIMIT=2)
+    def test_product_inline_only_for_small_categories(self):
+        self.client.force_login(User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass12345'
+        ))
+        url = f'/admin/products/category/{self.category.pk}/change/'
+        for _ in range(2):
+            self.make_product()
+        self.assertContains(self.client.get(url), 'products-TOTAL_FORMS')
+
+        self.make_product()
+        response = self.client.get(url)
+        self.assertNotContains(response, 'products-TOTAL_FORMS')
+        self.assertContains(response, f'category__id__exact={self.category.pk}')
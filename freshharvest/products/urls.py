@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'', views.ProductViewSet) 
 
 urlpatterns = [
+    # Async (ASGI-native) read paths; before the router so `async` is not taken as a pk
+    path('async/', async_views.product_list, name='product-list-async'),
+    path('async/<int:pk>/', async_views.product_detail, name='product-detail-async'),
+    path('async/categories/', async_views.category_list, name='category-list-async'),
+    path('stream/stock/', async_views.stock_stream, name='product-stock-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
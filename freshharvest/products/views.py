@@ -1,20 +1,27 @@
 from django.shortcuts import render
 from django.db import models
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
+from freshharvest.instrumentation import SerializerTimingMixin, serializer_data
+from freshharvest.pagination import SwitchablePagination
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+from .serializers import BulkProductPatchSerializer, CategorySerializer, ProductSerializer
+from .cache import CatalogCacheMixin, stats as cache_stats
+from .search import ProductSearchFilter
+from .bulk import FORMATS, detect_format, export_rows, import_products, iter_rows, patch_products
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Production-ready Category API
     Supports: CRUD, search, filtering, pagination
     """
-    queryset = Category.objects.all().order_by('name')
+    queryset = Category.objects.select_related('stats').order_by('name')
     serializer_class = CategorySerializer
     filter_backends = [
         DjangoFilterBackend,
@@ -36,13 +43,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
-        """Get categories with most products (business metric)"""
-        from django.db.models import Count
-        queryset = Category.objects.annotate(
-            product_count=Count('products')
-        ).filter(product_count__gt=0).order_by('-product_count')
+        """Get categories with most products (business metric, from CategoryStats)"""
+        queryset = Category.objects.select_related('stats').filter(
+            stats__product_count__gt=0
+        ).order_by('-stats__product_count')
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(serializer_data(serializer))
     
 
 ####
@@ -50,17 +56,20 @@ class CategoryViewSet(viewsets.ModelViewSet):
     from .serializers import ProductSerializer
 from .models import Product
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.select_related('category', 'farmer').all()
+class ProductViewSet(CatalogCacheMixin, SerializerTimingMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.select_related('category', 'farmer').defer('search_vector')
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_fields = ['category', 'is_available', 'farmer']
     search_fields = ['name', 'description']
-    ordering_fields = ['price', 'harvest_date', 'created_at']
+    ordering_fields = ['price', 'harvest_date', 'created_at', 'rank_score']  # -rank_score: ranked listing
+    pagination_class = SwitchablePagination  # ?pagination=cursor for keyset pages
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [permissions.AllowAny()]
+        if self.action == 'cache_stats':
+            return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
     
     def filter_queryset(self, queryset):
@@ -68,4 +77,77 @@ class ProductViewSet(viewsets.ModelViewSet):
         harvest_fresh = self.request.query_params.get('harvest_fresh')
         if harvest_fresh == 'true':
             qs = qs.filter(harvest_date__gte=models.functions.TruncDate(models.functions.Now()))
-        return qs
\ No newline at end of file
+        return qs
+    
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Catalog response cache hit/miss counters (admin only)"""
+        return Response(cache_stats())
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        **Bulk Import (farmers)**
+        
+        Multipart upload `file` (CSV or JSONL; `file_format` overrides the
+        extension). Rows are upserted on (farmer, sku); category is a slug.
+        Returns `{imported, failed, errors: [{row, errors}]}`.
+        """
+        if request.user.user_type != 'farmer':
+            return Response({'detail': 'Only farmers can import products.'}, status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['This field is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or detect_format(upload.name, upload.content_type)
+        if file_format not in FORMATS:
+            return Response({'file_format': [f'Use one of: {", ".join(FORMATS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = import_products(iter_rows(upload, file_format), farmer=request.user)
+        return Response(report, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk_patch(self, request):
+        """
+        **Bulk Price/Stock Update (farmers)**
+        
+        Apply up to 1000 `{id, price?, stock_quantity?}` updates to your own
+        products in one statement; `is_available` follows the new stock.
+        Ids that are unknown or belong to another farmer are listed in
+        `not_found` and left untouched.
+        
+        Request:
+        ```json
+        {
+          "updates": [
+            {"id": 1, "price": "120.00", "stock_quantity": 40},
+            {"id": 2, "stock_quantity": 0}
+          ]
+        }
+        ```
+        """
+        if request.user.user_type != 'farmer':
+            return Response({'detail': 'Only farmers can update products.'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = BulkProductPatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = patch_products(request.user, serializer.validated_data['updates'])
+        return Response(result, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    def bulk_export(self, request):
+        """
+        **Bulk Export (farmers)**
+        
+        Streams the farmer's products as `?file_format=csv` (default) or `jsonl`,
+        in the same layout the import accepts.
+        """
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response({'file_format': [f'Use one of: {", ".join(FORMATS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(
+            export_rows(Product.objects.filter(farmer=request.user), file_format),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
@@ -1,15 +1,24 @@
 from django.contrib import admin
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from freshharvest.admin_utils import LargeTableAdminMixin
+from .models import Region, User
+
+
+@admin.register(Region)
+class RegionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'parent']
+    list_filter = ['parent']
+    search_fields = ['name', 'slug']
+    prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     list_display = ['username', 'email', 'user_type', 'phone_number', 'location', 'is_verified', 'is_active', 'date_joined']
     list_filter = ['user_type', 'is_verified', 'is_active', 'date_joined']
     fieldsets = UserAdmin.fieldsets + (
         ('FreshHarvest Info', {
-            'fields': ('user_type', 'phone_number', 'location', 'is_verified')
+            'fields': ('user_type', 'phone_number', 'location', 'region', 'latitude', 'longitude', 'is_verified')
         }),
     )
     add_fieldsets = UserAdmin.add_fieldsets + (
@@ -0,0 +1,81 @@
+"""
+Async registration and login.
+
+Same request/response shapes as `/api/auth/register/` and
+`/api/auth/login/`, but the password hash is awaited from the
+`users.hashing` process pool, so a sign-up wave does not tie up the event
+loop or the shared sync thread under ASGI. Only validation and the final
+insert run through `sync_to_async`.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import hashing
+from .models import User
+from .serializers import RegisterSerializer
+from .tokens import ClaimsRefreshToken
+
+LOGIN_FAILED = 'No active account found with the given credentials'
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    data = _body(request)
+    if data is None:
+        return _json({'detail': 'Invalid JSON body.'}, status=400)
+    serializer = RegisterSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return _json(serializer.errors, status=400)
+    try:
+        encoded = await hashing.ahash_password(serializer.validated_data['password'])
+    except hashing.HashingBusy as exc:
+        return _json({'detail': exc.detail}, status=exc.status_code)
+    await sync_to_async(serializer.save)(password_hash=encoded)
+    return _json(serializer.data, status=201)
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    data = _body(request)
+    if data is None:
+        return _json({'detail': 'Invalid JSON body.'}, status=400)
+    email, password = data.get(User.USERNAME_FIELD), data.get('password')
+    if not isinstance(email, str) or not isinstance(password, str):
+        return _json({'detail': 'email and password are required.'}, status=400)
+
+    user = await User.objects.filter(email=email).afirst()
+    try:
+        if user is None:
+            await hashing.areject_unknown_user(password)
+            is_correct = False
+        else:
+            is_correct, new_hash = await hashing.acheck_password(password, user.password)
+    except hashing.HashingBusy as exc:
+        return _json({'detail': exc.detail}, status=exc.status_code)
+    if not is_correct or not user.is_active:
+        return _json({'detail': LOGIN_FAILED}, status=401)
+    if new_hash:
+        user.password = new_hash
+        await user.asave(update_fields=['password'])
+
+    refresh = ClaimsRefreshToken.for_user(user)
+    return _json({'refresh': str(refresh), 'access': str(refresh.access_token)})
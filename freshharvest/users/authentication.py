@@ -0,0 +1,81 @@
+"""
+JWT authentication without a per-request user lookup.
+
+Tokens carry the user's auth fields as signed claims (`users.tokens`).
+`ClaimsJWTAuthentication` builds `request.user` as a `ClaimsUser` from those
+claims, so views that filter or assign by `request.user` (cart, orders) run
+no user query; a view that reads another field (e.g. `email`) loads the rest
+of the row on first access.
+
+A token cannot tell that the account changed after it was issued, so each
+request is also checked against the user's auth state (`is_active` + the
+claim fields), cached for `AUTH_STATE_CACHE_TIMEOUT` seconds and dropped
+whenever the User is saved or deleted (`users.signals`). The state is only
+used to revoke: an inactive user is rejected, and so is a token whose claims
+no longer match the account (`token_claims_stale`), which the client swaps
+for a fresh one at /api/auth/token/refresh/ (`ClaimsTokenRefreshSerializer`
+re-reads the claims). A cache miss costs one narrow query.
+
+The invalidation is only as wide as the cache: with a per-process cache
+(LocMem) the other workers keep the old state for up to
+`AUTH_STATE_CACHE_TIMEOUT`, so multi-worker deployments need a shared cache
+backend (Redis, Memcached) for deactivation to apply at once.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser, User
+from .tokens import CLAIM_FIELDS
+
+STATE_FIELDS = ('is_active',) + CLAIM_FIELDS
+MISSING = 'missing'
+
+
+def state_key(user_id):
+    return f'users:auth:{user_id}'
+
+
+def get_auth_state(user_id):
+    """Cached `{is_active, <claim fields>}` for `user_id`, or None if there is no such user."""
+    key = state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*STATE_FIELDS).first() or MISSING
+        cache.set(key, state, timeout=getattr(settings, 'AUTH_STATE_CACHE_TIMEOUT', 60))
+    return None if state == MISSING else state
+
+
+def invalidate_auth_state(user_id):
+    cache.delete(state_key(user_id))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """`JWTAuthentication` that returns a `ClaimsUser` instead of loading the row."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+        try:
+            claims = {name: validated_token[name] for name in CLAIM_FIELDS}
+        except KeyError as e:
+            # Issued without claims: refreshing it adds them
+            raise InvalidToken(_('Token has no auth claims')) from e
+
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if any(state[name] != value for name, value in claims.items()):
+            raise AuthenticationFailed(_('Token claims are out of date'), code='token_claims_stale')
+
+        values = {'id': user_id, **claims}
+        # from_db() takes the values in concrete field order
+        names = [f.attname for f in ClaimsUser._meta.concrete_fields if f.attname in values]
+        return ClaimsUser.from_db('default', names, [values[name] for name in names])
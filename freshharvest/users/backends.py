@@ -0,0 +1,29 @@
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+from .models import User
+
+
+class PooledPasswordBackend(ModelBackend):
+    """
+    `ModelBackend` that checks (and, when the hasher settings changed,
+    upgrades) passwords in the `users.hashing` process pool.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            hashing.reject_unknown_user(password)
+            return None
+        is_correct, new_hash = hashing.check_password(password, user.password)
+        if not is_correct:
+            return None
+        if new_hash:
+            user.password = new_hash
+            user.save(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,65 @@
+"""
+Farmer directory queries.
+
+Region filters go through the `Region` lookup table (a county slug also
+matches its wards) and the partial (region, is_verified) index on farmers.
+Proximity uses a bounding box on the partial (latitude, longitude) index,
+then trims the box to the radius and orders by an equirectangular distance
+(accurate to well under 1% at directory distances, and needs no sqrt or
+trig in SQL). Available-product counts are correlated subqueries, so they
+are only computed for the rows of the returned page; they and the
+`has_products` probe read the partial (farmer) WHERE is_available index.
+"""
+import math
+
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from products.models import Product
+from .models import Region, User
+
+KM_PER_DEGREE = 111.32
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng, lng degree scale) around a point."""
+    dlat = radius_km / KM_PER_DEGREE
+    scale = max(math.cos(math.radians(lat)), 0.01)
+    dlng = dlat / scale
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng, scale
+
+
+def farmer_directory(region=None, verified=None, has_products=None, near=None, radius_km=25):
+    """Active farmers with `available_products`, filtered; nearest first when `near` is given."""
+    available = Product.objects.filter(farmer=OuterRef('pk'), is_available=True)
+    farmers = User.objects.filter(user_type='farmer', is_active=True).select_related('region').annotate(
+        available_products=Coalesce(
+            Subquery(available.values('farmer').annotate(total=Count('id')).values('total')), 0
+        ),
+    )
+    if region is not None:
+        farmers = farmers.filter(region__in=Region.objects.filter(Q(slug=region) | Q(parent__slug=region)))
+    if verified is not None:
+        farmers = farmers.filter(is_verified=verified)
+    if has_products is not None:
+        farmers = farmers.filter(Exists(available)) if has_products else farmers.exclude(Exists(available))
+
+    if near is None:
+        return farmers.order_by('username', 'id')
+
+    lat, lng = near
+    min_lat, max_lat, min_lng, max_lng, scale = bounding_box(lat, lng, radius_km)
+    dy = F('latitude') - Value(lat)
+    dx = (F('longitude') - Value(lng)) * Value(scale)
+    return farmers.filter(
+        latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng),
+    ).annotate(
+        distance_sq=dx * dx + dy * dy,
+    ).filter(
+        distance_sq__lte=(radius_km / KM_PER_DEGREE) ** 2,
+    ).order_by('distance_sq', 'id')
+
+
+def distance_km(farmer):
+    distance_sq = getattr(farmer, 'distance_sq', None)
+    return None if distance_sq is None else round(math.sqrt(distance_sq) * KM_PER_DEGREE, 2)
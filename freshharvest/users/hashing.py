@@ -0,0 +1,156 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 is deliberately CPU-bound; run inline, a burst of sign-ups or logins
+pins every WSGI worker thread (and, under ASGI, the shared sync thread).
+Here hashes are computed in a bounded process pool
+(`PASSWORD_HASHING_WORKERS` processes, started lazily with `spawn`), so
+the CPU work is capped at that many cores and the calling thread only
+waits on a future; the async views await it without blocking the event
+loop.
+
+At most `PASSWORD_HASHING_MAX_PENDING` hashes may be queued or running;
+beyond that `HashingBusy` (503) sheds the request instead of growing the
+queue. A pool broken by a dead worker is dropped and rebuilt on the next
+submit. `PASSWORD_HASHING_WORKERS = 0` hashes inline (development, tests).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_pool = None
+_pending = None
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress, please retry shortly.'
+    default_code = 'hashing_busy'
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+
+    django.setup()
+
+
+def _hash(raw):
+    return make_password(raw)
+
+
+def _verify(raw, encoded):
+    """(is_correct, new hash when the stored one uses outdated parameters)."""
+    is_correct, must_update = verify_password(raw, encoded)
+    return is_correct, make_password(raw) if is_correct and must_update else None
+
+
+def workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+
+
+def _get_pool():
+    global _pool, _pending
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'freshharvest.settings'),),
+            )
+        if _pending is None:
+            _pending = threading.BoundedSemaphore(
+                getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', workers() * 8)
+            )
+        return _pool, _pending
+
+
+def _discard(pool):
+    """
+    Forget a broken `pool` (if still current) so the next submit starts a new
+    one; the pending permits carry over.
+    """
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+
+
+def shutdown():
+    """Stop the pool (it restarts on next use, picking up changed settings)."""
+    global _pool, _pending
+    with _lock:
+        pool, _pool, _pending = _pool, None, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _submit(fn, *args):
+    if not workers():
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+    for attempt in range(2):
+        pool, pending = _get_pool()
+        if not pending.acquire(blocking=False):
+            raise HashingBusy
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            pending.release()
+            _discard(pool)
+            if attempt:
+                raise
+            continue
+        except BaseException:
+            pending.release()
+            raise
+        future.add_done_callback(lambda f, pool=pool, pending=pending: _done(f, pool, pending))
+        return future
+
+
+def _done(future, pool, pending):
+    pending.release()
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard(pool)
+
+
+def hash_password(raw):
+    return _submit(_hash, raw).result()
+
+
+def check_password(raw, encoded):
+    """(is_correct, new hash or None when the stored hash is up to date)."""
+    return _submit(_verify, raw, encoded).result()
+
+
+def _unknown_user(raw):
+    # Hash anyway so unknown accounts take as long as wrong passwords
+    return _submit(_hash, raw)
+
+
+def reject_unknown_user(raw):
+    """Spend a password check's worth of hashing on a login for no account."""
+    _unknown_user(raw).result()
+
+
+async def ahash_password(raw):
+    return await asyncio.wrap_future(_submit(_hash, raw))
+
+
+async def acheck_password(raw, encoded):
+    return await asyncio.wrap_future(_submit(_verify, raw, encoded))
+
+
+async def areject_unknown_user(raw):
+    await asyncio.wrap_future(_unknown_user(raw))
@@ -3,6 +3,31 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 
+class Region(models.Model):
+    """
+    Location lookup table: counties, with wards as children (`parent`).
+    Farmers point at the most specific one they are in.
+    """
+    name = models.CharField(max_length=100, verbose_name=_('Name'))
+    slug = models.SlugField(max_length=100, unique=True, verbose_name=_('Slug'))
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='children',
+        verbose_name=_('Parent Region')
+    )
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = _('Region')
+        verbose_name_plural = _('Regions')
+
+    def __str__(self):
+        return self.name
+
+
 class User(AbstractUser):
     USER_TYPES = (
         ('farmer', 'Farmer'),
@@ -34,6 +59,18 @@ class User(AbstractUser):
         verbose_name=_('Location')
     )
 
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='users',
+        verbose_name=_('Region')
+    )
+
+    latitude = models.FloatField(null=True, blank=True, verbose_name=_('Latitude'))
+    longitude = models.FloatField(null=True, blank=True, verbose_name=_('Longitude'))
+
     is_verified = models.BooleanField(
         default=False,
         verbose_name=_('Is Verified')
@@ -47,9 +84,35 @@ class User(AbstractUser):
         indexes = [
             models.Index(fields=['user_type', 'is_verified']),
             models.Index(fields=['location']),
+            # Farmer directory: region lookups and bounding-box scans
+            models.Index(
+                fields=['region', 'is_verified'], name='idx_farmer_region',
+                condition=models.Q(user_type='farmer'),
+            ),
+            models.Index(
+                fields=['latitude', 'longitude'], name='idx_farmer_lat_lng',
+                condition=models.Q(user_type='farmer'),
+            ),
         ]
         verbose_name = _('User')
         verbose_name_plural = _('Users')
 
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()}) - {self.email}"
+
+
+class ClaimsUser(User):
+    """
+    User built by `users.authentication` without loading its row. Only the
+    auth fields are set; touching any other field loads all of them in one
+    query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
@@ -1,15 +1,31 @@
 from rest_framework import serializers, generics, permissions
-from .models import User
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from . import hashing
+from .directory import distance_km
+from .models import Region, User
+from .tokens import CLAIM_FIELDS, ClaimsRefreshToken, set_claims
 from django.contrib.auth.password_validation import validate_password
 
 class UserSerializer(serializers.ModelSerializer):
+    region = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Region.objects.all(), required=False, allow_null=True
+    )
+
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'user_type', 'phone_number',
-            'location', 'is_verified', 'is_active', 'date_joined'
+            'location', 'region', 'latitude', 'longitude',
+            'is_verified', 'is_active', 'date_joined'
         ]
         read_only_fields = ['id', 'date_joined', 'is_verified']
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -26,8 +42,16 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
-        return user
+        raw = validated_data.pop('password')
+        # The async view hashes beforehand and passes `password_hash`
+        encoded = validated_data.pop('password_hash', None) or hashing.hash_password(raw)
+        # create_user() would hash on this thread
+        return User.objects.create(
+            email=User.objects.normalize_email(validated_data.pop('email')),
+            username=User.normalize_username(validated_data.pop('username')),
+            password=encoded,
+            **validated_data,
+        )
 
 
 class LoginSerializer(serializers.Serializer):
@@ -37,4 +61,68 @@ class LoginSerializer(serializers.Serializer):
 
 class UserRegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
-    permission_classes = [permissions.AllowAny]
\ No newline at end of file
+    permission_classes = [permissions.AllowAny]
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login that issues tokens carrying the auth claims (see users.authentication)."""
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that re-reads the auth claims from the user row, so the new
+    access token matches the account (see users.authentication).
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        claims = User.objects.filter(pk=access[api_settings.USER_ID_CLAIM]).values(*CLAIM_FIELDS).first()
+        if claims is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        set_claims(access, claims)
+        data['access'] = str(access)
+        if 'refresh' in data:
+            refresh = self.token_class(data['refresh'])
+            set_claims(refresh, claims)
+            data['refresh'] = str(refresh)
+        return data
+
+class RegionSerializer(serializers.ModelSerializer):
+    parent = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+
+    class Meta:
+        model = Region
+        fields = ['id', 'name', 'slug', 'parent']
+
+class FarmerDirectorySerializer(serializers.ModelSerializer):
+    region = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    region_name = serializers.CharField(source='region.name', read_only=True, default=None)
+    available_products = serializers.IntegerField(read_only=True)
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'location', 'region', 'region_name', 'latitude', 'longitude',
+            'is_verified', 'available_products', 'distance_km'
+        ]
+
+    def get_distance_km(self, obj):
+        return distance_km(obj)
+
+class FarmerDirectoryFilterSerializer(serializers.Serializer):
+    region = serializers.SlugField(required=False)
+    verified = serializers.BooleanField(required=False, allow_null=True, default=None)
+    has_products = serializers.BooleanField(required=False, allow_null=True, default=None)
+    near = serializers.CharField(required=False, help_text='"latitude,longitude"')
+    radius_km = serializers.FloatField(min_value=0.1, max_value=200, default=25)
+
+    def validate_near(self, value):
+        try:
+            lat, lng = (float(part) for part in value.split(','))
+        except ValueError:
+            raise serializers.ValidationError('Use "latitude,longitude".')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise serializers.ValidationError('Coordinates out of range.')
+        return lat, lng
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_auth_state
+from .models import ClaimsUser, User
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=ClaimsUser)
+def user_changed(sender, instance, **kwargs):
+    # Drop now and again after commit, so a concurrent request cannot
+    # re-cache the pre-commit row
+    invalidate_auth_state(instance.pk)
+    transaction.on_commit(lambda: invalidate_auth_state(instance.pk))
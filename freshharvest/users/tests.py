@@ -1,3 +1,227 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from freshharvest.pagination import KeysetPagination
+from .authentication import state_key
+from .models import Region, User
+from .tokens import CLAIM_FIELDS
+
+
+class ClaimsAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='pass12345', user_type='consumer'
+        )
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'buyer@example.com', 'password': 'pass12345'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.refresh = response.data['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in ctx.captured_queries if '"users_user"' in q['sql']]
+
+    def test_cart_requests_do_not_load_the_user_row(self):
+        response, queries = self.user_queries('/api/cart/items/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)  # auth state cache miss
+        self.assertNotIn('"email"', queries[0])
+
+        response, queries = self.user_queries('/api/cart/items/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_other_fields_are_loaded_on_access(self):
+        self.user_queries('/api/cart/items/summary/')
+        response, queries = self.user_queries('/api/users/me/')
+        self.assertEqual(response.data['email'], 'buyer@example.com')
+        self.assertEqual(response.data['user_type'], 'consumer')
+        self.assertEqual(len(queries), 1)
+
+    def test_tokens_with_stale_or_missing_claims_are_rejected(self):
+        cache.set(state_key(self.user.pk), {'is_active': True, **{
+            name: getattr(self.user, name) for name in CLAIM_FIELDS
+        }, 'user_type': 'farmer'})
+        self.assertEqual(self.client.get('/api/cart/items/summary/').status_code, 401)
+
+        token = RefreshToken.for_user(self.user).access_token
+        response = self.client.get('/api/cart/items/summary/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_changes_apply_to_issued_tokens(self):
+        self.user_queries('/api/cart/items/summary/')
+        self.user.user_type = 'farmer'
+        self.user.save()
+        response = self.client.get('/api/farmer/sales/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'token_claims_stale')
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/farmer/sales/').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/cart/items/summary/').status_code, 401)
+
+
+class PasswordHashingTestCase(APITestCase):
+    signup = {
+        'username': 'newbuyer', 'email': 'new@example.com', 'password': 'Sokoni-2026!',
+        'password_confirm': 'Sokoni-2026!', 'user_type': 'consumer',
+    }
+
+    def test_pool_hashes_verify(self):
+        from . import hashing
+
+        encoded = hashing.hash_password('Sokoni-2026!')
+        self.assertEqual(hashing.check_password('Sokoni-2026!', encoded), (True, None))
+        self.assertEqual(hashing.check_password('wrong', encoded), (False, None))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_PENDING=1)
+    def test_broken_pool_is_rebuilt(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        from . import hashing
+
+        hashing.shutdown()
+        self.addCleanup(hashing.shutdown)
+        broken, _ = hashing._get_pool()
+        with mock.patch.object(broken, 'submit', side_effect=BrokenProcessPool):
+            encoded = hashing.hash_password('Sokoni-2026!')
+        # The retry on the new pool got the single permit back
+        self.assertIsNot(hashing._pool, broken)
+        self.assertEqual(hashing.check_password('Sokoni-2026!', encoded), (True, None))
+        broken.shutdown()
+
+    def test_sync_and_async_registration_and_login(self):
+        response = self.client.post('/api/auth/register/', self.signup, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email='new@example.com').check_password('Sokoni-2026!'))
+
+        response = self.client.post('/api/auth/async/register/', {
+            **self.signup, 'username': 'other', 'email': 'other@example.com',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['email'], 'other@example.com')
+        response = self.client.post('/api/auth/async/register/', self.signup, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        credentials = {'email': 'other@example.com', 'password': 'Sokoni-2026!'}
+        for url in ('/api/auth/login/', '/api/auth/async/login/'):
+            response = self.client.post(url, credentials, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('access', response.json())
+            response = self.client.post(url, {**credentials, 'password': 'nope'}, format='json')
+            self.assertEqual(response.status_code, 401)
+
+    def test_unknown_accounts_cost_a_hash_on_both_login_paths(self):
+        from . import hashing
+
+        for url in ('/api/auth/login/', '/api/auth/async/login/'):
+            with mock.patch.object(hashing, '_unknown_user', wraps=hashing._unknown_user) as unknown_user:
+                response = self.client.post(url, {'email': 'ghost@example.com', 'password': 'nope'}, format='json')
+            self.assertEqual(response.status_code, 401)
+            unknown_user.assert_called_once_with('nope')
+
+    @override_settings(
+        PASSWORD_HASHING_WORKERS=0,
+        PASSWORD_HASHERS=['users.hashers.TunablePBKDF2PasswordHasher'],
+        PASSWORD_PBKDF2_ITERATIONS=1000,
+    )
+    def test_login_rehashes_with_new_work_factor(self):
+        user = User.objects.create_user(username='u', email='u@example.com', password='Sokoni-2026!')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        credentials = {'email': 'u@example.com', 'password': 'Sokoni-2026!'}
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.client.post('/api/auth/login/', credentials, format='json').status_code, 200)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=3000):
+            self.assertEqual(self.client.post('/api/auth/async/login/', credentials, format='json').status_code, 200)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$3000$'))
+
+
+class FarmerDirectoryTestCase(APITestCase):
+    def setUp(self):
+        from products.models import Category, Product
+
+        self.kiambu = Region.objects.create(name='Kiambu', slug='kiambu')
+        limuru = Region.objects.create(name='Limuru', slug='limuru', parent=self.kiambu)
+        nakuru = Region.objects.create(name='Nakuru', slug='nakuru')
+        category = Category.objects.create(name='Vegetables')
+
+        def farmer(name, region, lat, lng, verified=True, products=0):
+            user = User.objects.create_user(
+                username=name, email=f'{name}@example.com', password=None, user_type='farmer',
+                region=region, latitude=lat, longitude=lng, is_verified=verified,
+            )
+            for i in range(products):
+                Product.objects.create(
+                    name=f'{name} {i}', description='Fresh', price=Decimal('10.00'), stock_quantity=5,
+                    category=category, farmer=user, harvest_date=date.today(),
+                )
+            return user
+
+        self.ruiru = farmer('ruiru', self.kiambu, -1.146, 36.961, products=2)
+        self.tigoni = farmer('tigoni', limuru, -1.136, 36.671, products=1)
+        self.unverified = farmer('unverified', limuru, -1.10, 36.64, verified=False, products=1)
+        self.empty = farmer('empty', self.kiambu, -1.17, 36.83)
+        self.naivasha = farmer('naivasha', nakuru, -0.717, 36.431, products=3)
+        User.objects.create_user(username='buyer', email='buyer@example.com', password=None, region=self.kiambu)
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_region_filter_includes_wards_and_counts_available_products(self):
+        with self.assertNumQueries(2):  # count + page
+            response = self.client.get('/api/farmers/?region=kiambu&verified=true&has_products=true')
+        self.assertEqual(self.ids(response), [self.ruiru.id, self.tigoni.id])
+        self.assertEqual(
+            [(row['region'], row['available_products']) for row in response.data['results']],
+            [('kiambu', 2), ('limuru', 1)],
+        )
+        self.assertEqual(
+            self.ids(self.client.get('/api/farmers/?region=limuru')), [self.tigoni.id, self.unverified.id]
+        )
+
+    def test_near_orders_by_distance_within_radius(self):
+        # Nairobi CBD
+        response = self.client.get('/api/farmers/?near=-1.286,36.817&radius_km=30')
+        self.assertEqual(self.ids(response), [self.empty.id, self.ruiru.id, self.tigoni.id, self.unverified.id])
+        self.assertAlmostEqual(response.data['results'][0]['distance_km'], 13.1, delta=0.5)
+        self.assertEqual(
+            self.ids(self.client.get('/api/farmers/?near=-1.286,36.817&radius_km=100')),
+            [self.empty.id, self.ruiru.id, self.tigoni.id, self.unverified.id, self.naivasha.id],
+        )
+        self.assertEqual(self.client.get('/api/farmers/?near=kiambu').status_code, 400)
+
+    def test_cursor_pages_skip_the_count(self):
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            url = '/api/farmers/?pagination=cursor&near=-1.286,36.817&radius_km=100'
+            seen, pages = [], 0
+            while url:
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertNotIn('count', response.data)
+                seen += self.ids(response)
+                url = response.data['next']
+                pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [self.empty.id, self.ruiru.id, self.tigoni.id, self.unverified.id, self.naivasha.id])
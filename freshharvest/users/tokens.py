@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# User fields copied into every token, and read back by
+# `users.authentication.ClaimsJWTAuthentication` to build `request.user`
+CLAIM_FIELDS = ('user_type', 'is_verified', 'is_staff', 'is_superuser')
+
+
+def set_claims(token, values):
+    """Copy `CLAIM_FIELDS` from `values` (a mapping) onto `token`."""
+    for name in CLAIM_FIELDS:
+        token[name] = values[name]
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token (and derived access tokens) carrying `CLAIM_FIELDS`."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_claims(token, {name: getattr(user, name) for name in CLAIM_FIELDS})
+        return token
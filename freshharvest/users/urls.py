@@ -1,14 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet)
+router.register(r'farmers', views.FarmerDirectoryViewSet, basename='farmer')
+router.register(r'regions', views.RegionViewSet)
 
 urlpatterns = [
     path('auth/register/', views.UserRegisterView.as_view(), name='register'),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/async/register/', async_views.register, name='register-async'),
+    path('auth/async/login/', async_views.login, name='login-async'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -4,8 +4,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import User
-from .serializers import UserSerializer, RegisterSerializer
+from freshharvest.instrumentation import SerializerTimingMixin, serializer_data
+from freshharvest.pagination import SwitchablePagination
+from .directory import farmer_directory
+from .models import Region, User
+from .serializers import (
+    FarmerDirectoryFilterSerializer, FarmerDirectorySerializer, RegionSerializer, UserSerializer, RegisterSerializer,
+)
 
 
 
@@ -17,7 +22,7 @@ class UserRegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     filter_backends = [DjangoFilterBackend]
@@ -36,7 +41,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request):
         """Get current user profile"""
         serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        return Response(serializer_data(serializer))
 
     @action(detail=False, methods=['put', 'patch'])
     def profile(self, request):
@@ -47,3 +52,39 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RegionViewSet(SerializerTimingMixin, viewsets.ReadOnlyModelViewSet):
+    """Counties and their wards, for the farmer directory `region` filter"""
+    queryset = Region.objects.select_related('parent')
+    serializer_class = RegionSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+
+class FarmerDirectoryViewSet(viewsets.GenericViewSet):
+    serializer_class = FarmerDirectorySerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = SwitchablePagination  # ?pagination=cursor skips the count
+
+    @property
+    def cursor_ordering(self):
+        return 'distance_sq' if self.filters.get('near') else 'username'
+
+    def list(self, request):
+        """
+        **Farmer Directory**
+        
+        Active farmers with their count of available products. Filters:
+        `region` (county or ward slug; a county includes its wards),
+        `verified`, `has_products` (true/false), and `near=lat,lng` with
+        `radius_km` (default 25, max 200), which orders results nearest
+        first and adds `distance_km`. `?pagination=cursor` returns keyset
+        pages without a total count.
+        """
+        filters = FarmerDirectoryFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        self.filters = filters.validated_data
+        queryset = farmer_directory(**self.filters)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(serializer_data(self.get_serializer(page, many=True)))